@@ -0,0 +1,164 @@
+"""
+columnar export
+This module is part of ANITA
+
+This module contains the export of the merged data as columnar datasets (Parquet or Feather), used by the dashboard.
+There are three datasets: product, vendor and feedback, with the same columns as the CSV files of the dashboard.
+Every dataset is partitioned by market and dump date:
+    export_folder/dataset/market=[market]/date=[yyyy_mm_dd]/[page_type].[parquet or feather]
+The export is done by store_json (see Merge) for every export of a market and date that is written, only the partitions
+of the dumps that are stored in the run are written again, the partitions of earlier dumps are kept.
+The columns are built at once from the items of an export, not row by row.
+"""
+
+import os
+import json
+import datetime
+import time
+import importlib.util
+import pandas as pd
+
+# Folder of the datasets, None when the columnar export is not used
+export_folder = None
+
+# File format of the datasets: 'parquet' or 'feather'
+file_format = 'parquet'
+
+# The columns of the product dataset with the field of the page_data {column : field}
+product_columns = {'name': 'name', 'vendor': 'vendor', 'ships_from': 'ships_from', 'ships_to': 'ships_to',
+                   'price': 'price', 'price_eur': 'price_eur', 'info': 'info', 'macro_category': 'macro_category',
+                   'micro_category': 'micro_category'}
+
+# The columns of the vendor dataset with the field of the page_data {column : field}
+vendor_columns = {'score': 'score', 'score_normalized': 'score_normalized', 'registration_date': 'registration',
+                  'registration_date_deviation': 'registration_deviation', 'last_login': 'last_login',
+                  'last_login_deviation': 'last_login_deviation', 'sales': 'sales', 'info': 'info', 'pgp': 'pgp'}
+
+
+def configure(folder, export_format='parquet'):
+    """Sets the folder of the datasets, None to stop the columnar export, and the file format
+    export_format can be 'parquet' or 'feather', both need the package pyarrow to be installed"""
+    global export_folder, file_format
+    if export_format not in ['parquet', 'feather']:
+        raise ValueError(f'Unknown file format: {export_format}')
+    if folder is not None and importlib.util.find_spec('pyarrow') is None:
+        raise ValueError('The package pyarrow is not installed')
+    export_folder = folder
+    file_format = export_format
+
+
+def convert_date(o):
+    """Dates are stored in unix time (the same as in the exported JSON files)"""
+    if isinstance(o, datetime.date):
+        return time.mktime(o.timetuple())
+    return o
+
+
+def column_values(values):
+    """Returns the values of a column in a type that can be stored in a columnar file
+    Lists and dicts (e.g. ships_to, score) and columns with both text and numbers are stored as text (JSON)"""
+    values = [convert_date(value) for value in values]
+    types = set(type(value) for value in values if value is not None)
+    if types - {int, float, bool} and (len(types) > 1 or types & {list, tuple, dict}):
+        return [value if value is None or isinstance(value, str) else json.dumps(value, default=convert_date)
+                for value in values]
+    return values
+
+
+def create_frame(columns):
+    """Creates a DataFrame from the columns {column : values}"""
+    return pd.DataFrame({column: column_values(values) for column, values in columns.items()})
+
+
+def product_frame(items):
+    """Returns the DataFrame of the product dataset of an export {product_id : data}"""
+    columns = {'product_id': list(items),
+               'market': [items[item_id]['web_page']['market'] for item_id in items],
+               'extraction_date': [items[item_id]['web_page']['date'] for item_id in items]}
+    for column, field in product_columns.items():
+        columns[column] = [items[item_id]['page_data'].get(field) for item_id in items]
+    return create_frame(columns)
+
+
+def vendor_frame(items):
+    """Returns the DataFrame of the vendor dataset of an export {name : data}"""
+    columns = {'name': list(items),
+               'market': [items[item_id]['web_page']['market'] for item_id in items],
+               'extraction_date': [items[item_id]['web_page']['date'] for item_id in items]}
+    for column, field in vendor_columns.items():
+        columns[column] = [items[item_id]['page_data'].get(field) for item_id in items]
+    return create_frame(columns)
+
+
+def feedback_frame(items, page_type):
+    """Returns the DataFrame of the feedback dataset of an export {item_id : data}, one row per review
+    The fields of the reviews differ per market, every field is a column"""
+    item_ids, markets, extraction_dates, reviews = [], [], [], []
+    for item_id in items:
+        for review in items[item_id]['page_data'].get('feedback') or []:
+            item_ids.append(item_id)
+            markets.append(items[item_id]['web_page']['market'])
+            extraction_dates.append(items[item_id]['web_page']['date'])
+            reviews.append(review)
+
+    columns = {'item_id': item_ids, 'page_type': [page_type] * len(item_ids), 'market': markets,
+               'extraction_date': extraction_dates}
+    fields = []
+    for review in reviews:
+        fields += [field for field in review if field not in fields and field not in columns]
+    for field in fields:
+        columns[field] = [review.get(field) for review in reviews]
+    return create_frame(columns)
+
+
+def partition_path(dataset, market, date, page_type):
+    """Returns the path of the file of the partition of the market and date of the dataset"""
+    return os.path.join(export_folder, dataset, 'market=' + market, 'date=' + date, page_type + '.' + file_format)
+
+
+def write_frame(df, path):
+    """Writes the DataFrame to the path, the file of the partition is replaced"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if file_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(path)
+
+
+def export_snapshot(market, date, page_type, items):
+    """Writes the partitions of the market and date of an export {item_id : data} of store_json"""
+    if page_type == 'product':
+        write_frame(product_frame(items), partition_path('product', market, date, page_type))
+    else:
+        write_frame(vendor_frame(items), partition_path('vendor', market, date, page_type))
+    write_frame(feedback_frame(items, page_type), partition_path('feedback', market, date, page_type))
+
+
+def list_partitions(dataset, markets=None, dates=None):
+    """Returns the files of the partitions of the dataset, optionally only of the markets and dates (yyyy_mm_dd)"""
+    dataset_path = os.path.join(export_folder, dataset)
+    paths = []
+    if not os.path.isdir(dataset_path):
+        return paths
+    for market_folder in sorted(os.listdir(dataset_path)):
+        market = market_folder[len('market='):]
+        if markets is not None and market not in markets:
+            continue
+        for date_folder in sorted(os.listdir(os.path.join(dataset_path, market_folder))):
+            date = date_folder[len('date='):]
+            if dates is not None and date not in dates:
+                continue
+            date_path = os.path.join(dataset_path, market_folder, date_folder)
+            paths += [os.path.join(date_path, file) for file in sorted(os.listdir(date_path))
+                      if file.endswith('.' + file_format)]
+    return paths
+
+
+def load_dataset(dataset, markets=None, dates=None):
+    """Returns the dataset ('product', 'vendor' or 'feedback') as one DataFrame, optionally only of the markets and
+    dates (yyyy_mm_dd), only the files of those partitions are read"""
+    read = pd.read_parquet if file_format == 'parquet' else pd.read_feather
+    frames = [read(path) for path in list_partitions(dataset, markets, dates)]
+    if len(frames) == 0:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,118 @@
+"""
+content index
+This module is part of ANITA
+
+This module contains the index of the content of the pages in the sorted store, used to find duplicate pages at import.
+Crawls often save the same unchanged page again within a dump. For every page in the sorted store the hash of the html
+and the date of its dump are kept in a SQLite file in the sorted store. Before the hash is calculated the volatile parts
+of the page are removed, such as CSRF tokens, timestamps and the url comment of the browser. Which parts are volatile
+can be given per market with volatile_patterns in the market module (see template).
+A page of which the hash is already in the index for the same date is not imported and parsed again, it is recorded as
+a reference to the page in the sorted store with the same content. A page that is unchanged since an earlier dump is
+imported, every dump keeps all its pages (the export of a date only contains the pages of that date).
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+from .MarketScraper import MarketIdentifier
+
+# Name of the index file in the sorted store
+index_name = 'content_index.sqlite'
+
+# The volatile parts of the pages of all markets
+default_volatile_patterns = [
+    re.compile(rb'<!-- saved from url=[^>]*-->'),
+    re.compile(rb'<input[^>]*name="[^"]*(?:csrf|token)[^"]*"[^>]*>', re.IGNORECASE),
+    re.compile(rb'<meta[^>]*name="[^"]*(?:csrf|token)[^"]*"[^>]*>', re.IGNORECASE),
+]
+
+
+class ContentIndex:
+    """The hashes of the pages in the sorted store, and the duplicate pages that refer to them"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS pages (hash TEXT NOT NULL, date TEXT NOT NULL, '
+                                'market TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (hash, date))')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS duplicates '
+                                '(path TEXT PRIMARY KEY, hash TEXT NOT NULL, original TEXT NOT NULL)')
+        self.connection.commit()
+        self.duplicates_found = 0  # number of duplicates found since the index is opened
+
+    def find(self, content_hash, date):
+        """Returns the path of the page in the sorted store with the hash in the dump of the date (yyyy_mm_dd), or None
+        if there is no such page"""
+        row = self.connection.execute('SELECT path FROM pages WHERE hash = ? AND date = ?',
+                                      (content_hash, date)).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def add_page(self, content_hash, market, date, path):
+        """Adds a page of the dump of the date (yyyy_mm_dd) in the sorted store to the index, a page that is already in
+        the index for the date is kept"""
+        with self.connection:
+            self.connection.execute('INSERT OR IGNORE INTO pages (hash, date, market, path) VALUES (?, ?, ?, ?)',
+                                    (content_hash, date, market, path))
+
+    def add_duplicate(self, path, content_hash, original):
+        """Records a duplicate page: the path it would have in the sorted store and the path of the original page"""
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO duplicates (path, hash, original) VALUES (?, ?, ?)',
+                                    (path, content_hash, original))
+        self.duplicates_found += 1
+
+    def duplicates(self):
+        """Returns a dict with all recorded duplicates {path : original}"""
+        return dict(self.connection.execute('SELECT path, original FROM duplicates').fetchall())
+
+    def close(self):
+        self.connection.close()
+
+
+def strip_volatile(html_bytes, market_modules):
+    """Returns the html without the volatile parts of the markets the page can belong to"""
+    patterns = list(default_volatile_patterns)
+    for market in MarketIdentifier.identify_market_bytes(html_bytes):
+        if market in market_modules:
+            patterns += getattr(market_modules[market], 'volatile_patterns', [])
+
+    for pattern in patterns:
+        html_bytes = pattern.sub(b'', html_bytes)
+    return html_bytes
+
+
+def content_hash(html_bytes, market_modules):
+    """Returns the hash of the content of the page, the volatile parts are not part of the content"""
+    return hashlib.sha256(strip_volatile(html_bytes, market_modules)).hexdigest()
+
+
+def index_sorted_store(index, main_target_path, market_modules):
+    """Adds all pages in the sorted store (main_target_path/market/date/page) to the index"""
+    for market in os.listdir(main_target_path):
+        market_path = os.path.join(main_target_path, market)
+        if market not in market_modules or not os.path.isdir(market_path):
+            continue
+        for date in os.listdir(market_path):
+            date_path = os.path.join(market_path, date)
+            if not os.path.isdir(date_path):
+                continue
+            for file in os.listdir(date_path):
+                if file.endswith((".html", ".htm")):
+                    path = date_path + '/' + file
+                    with open(path, 'rb') as html_file:
+                        index.add_page(content_hash(html_file.read(), market_modules), market, date, path)
+
+
+def open_index(main_target_path, market_modules):
+    """Opens the content index of the sorted store
+    When the sorted store has no index yet, the index is created with the pages that are already in the store"""
+    path = os.path.join(main_target_path, index_name)
+    new_index = not os.path.isfile(path)
+    index = ContentIndex(path)
+    if new_index:
+        index_sorted_store(index, main_target_path, market_modules)
+    return index
@@ -0,0 +1,157 @@
+"""
+exchange rates
+This module is part of ANITA
+
+This module contains the local store of exchange rates used for the conversion of prices.
+Rates are stored in a SQLite file per (currency pair, date) and kept in memory once used. Only rates that are not in
+the store are requested from the upstream services (or a local stand-in service with the same API), or none at all
+when working offline. Rates can be imported in bulk from CSV files.
+
+Currency pairs:
+    'EUR/USD': the number of dollars for one euro
+    'BTC/USD': the number of dollars for one bitcoin
+"""
+
+import os
+import csv
+import sqlite3
+import datetime
+import requests
+
+# Path of the SQLite file of the store
+store_path = 'exchange_rates.sqlite'
+
+# When True the rates are only taken from the store, missing rates are never requested
+offline = False
+
+# The upstream services, can be replaced by a local stand-in service with the same API
+usd_eur_url = 'https://api.exchangeratesapi.io/history?start_at={start}&end_at={end}&symbols=USD'
+btc_usd_url = 'https://api.coindesk.com/v1/bpi/historical/close.json?start={start}&end={end}'
+
+# The store of this process, opened by get_store
+store = None
+
+# The (pair, date) combinations that are already requested by this process, these are not requested again
+requested = set()
+
+
+class RateStore:
+    """Exchange rates per (pair, date) in a SQLite file, with the rates that are used kept in memory"""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS rates '
+                                '(pair TEXT NOT NULL, date TEXT NOT NULL, rate REAL NOT NULL, PRIMARY KEY (pair, date))')
+        self.connection.commit()
+        self.memory = {}  # {(pair, date) : rate}, None if the rate is not in the store
+
+    def get(self, pair, date):
+        """Returns the rate of the pair on the date (yyyy-mm-dd), or None if it is not in the store"""
+        if (pair, date) not in self.memory:
+            row = self.connection.execute('SELECT rate FROM rates WHERE pair = ? AND date = ?', (pair, date)).fetchone()
+            self.memory[(pair, date)] = row[0] if row is not None else None
+        return self.memory[(pair, date)]
+
+    def add(self, pair, rates):
+        """Adds the rates of the pair to the store, rates is a dict {date : rate}"""
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO rates (pair, date, rate) VALUES (?, ?, ?)',
+                                        [(pair, date, float(rate)) for date, rate in rates.items()])
+        for date, rate in rates.items():
+            self.memory[(pair, date)] = float(rate)
+
+    def import_csv(self, csv_path, pair=None):
+        """Imports the rates of a CSV file with the columns 'date' (yyyy-mm-dd) and 'rate'
+        The pair is taken from the column 'pair' if it is not given
+        Returns the number of imported rates"""
+        rates = {}
+        with open(csv_path, newline='') as csv_file:
+            for row in csv.DictReader(csv_file):
+                row_pair = pair if pair is not None else row['pair']
+                if row_pair not in rates:
+                    rates[row_pair] = {}
+                rates[row_pair][row['date']] = row['rate']
+
+        for row_pair in rates:
+            self.add(row_pair, rates[row_pair])
+        return sum(len(rates[row_pair]) for row_pair in rates)
+
+    def close(self):
+        self.connection.close()
+
+
+def get_store():
+    """Returns the store of this process, and opens it if needed"""
+    global store
+    # A store opened by another process (before a fork) cannot be used
+    if store is None or store.pid != os.getpid() or store.path != store_path:
+        store = RateStore(store_path)
+    return store
+
+
+def configure(path=None, offline_mode=None, usd_eur=None, btc_usd=None):
+    """Changes the settings of the store, only the given settings are changed"""
+    global store_path, offline, usd_eur_url, btc_usd_url
+    if path is not None:
+        store_path = path
+    if offline_mode is not None:
+        offline = offline_mode
+    if usd_eur is not None:
+        usd_eur_url = usd_eur
+    if btc_usd is not None:
+        btc_usd_url = btc_usd
+
+
+def import_csv(csv_path, pair=None):
+    """Imports the rates of a CSV file into the store, see RateStore.import_csv"""
+    return get_store().import_csv(csv_path, pair)
+
+
+def request_rates(pair, start, end):
+    """Requests the rates of the pair between start and end (datetime.date) from the upstream service
+    Returns a dict {date : rate}, empty if the request went wrong"""
+    start = start.strftime('%Y-%m-%d')
+    end = end.strftime('%Y-%m-%d')
+    try:
+        if pair == 'EUR/USD':
+            response = requests.get(usd_eur_url.format(start=start, end=end))
+            if response.status_code != 200:
+                print('error: Request went wrong, exchangerates api status code: ' + str(response.status_code))
+                return {}
+            return {date: rates['USD'] for date, rates in response.json()['rates'].items()}
+        if pair == 'BTC/USD':
+            response = requests.get(btc_usd_url.format(start=start, end=end))
+            if response.status_code != 200:
+                print('error: Request went wrong, coindesk api status code: ' + str(response.status_code))
+                return {}
+            return response.json()['bpi']
+    except:
+        print(f'something went wrong with the exchange rate service of {pair}')
+        print(f'requested: {start} and {end}')
+    return {}
+
+
+def get_rate(pair, date):
+    """Returns the rate of the pair on the date (datetime.date), or None if it cannot be found
+    The rate is taken from the store, and only requested from the upstream service if it is missing"""
+    rate_store = get_store()
+    date_key = date.strftime('%Y-%m-%d')
+    rate = rate_store.get(pair, date_key)
+    if rate is not None or offline or (pair, date_key) in requested:
+        return rate
+    requested.add((pair, date_key))
+
+    # Request the rate, the rates of EUR/USD are not published in the weekend thus the next day is used as well
+    if pair == 'EUR/USD':
+        rates = request_rates(pair, date, date + datetime.timedelta(days=1))
+    else:
+        rates = request_rates(pair, date, date)
+    if date_key not in rates and len(rates) > 0:
+        rates[date_key] = rates[sorted(rates)[0]]
+
+    if date_key in rates:
+        rate_store.add(pair, rates)
+        return rate_store.get(pair, date_key)
+    return None
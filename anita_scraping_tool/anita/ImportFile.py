@@ -9,7 +9,26 @@ import os
 import datetime
 import zipfile
 import shutil
-from .Scraper import determine_market, open_folder, import_market_modules, get_soup
+from .MarketScraper import MarketIdentifier
+from .Scraper import open_folder, import_market_modules, read_bytes, identify_page, create_page, page_to_json, \
+    report_unmatched_pages
+from .PriceNormalizer import normalize_prices
+from .ContentIndex import open_index, content_hash
+from .Manifest import open_manifest
+
+
+def find_folder_date(folder, folder_dates):
+    """Returns the date of the folder: the date at the beginning of the name of the folder (yyyy_mm_dd), or if there
+    is none the date of the closest parent folder with a date. None if no folder in the path has a date
+    The date of every folder is determined only once, folder_dates is the dict {folder : date} of the known folders"""
+    if folder not in folder_dates:
+        parent, separator, name = folder.rpartition('/')
+        try:
+            folder_dates[folder] = datetime.datetime.strptime(name[0:10], '%Y_%m_%d').date()
+        except ValueError:
+            # inherit the date of the parent folder
+            folder_dates[folder] = find_folder_date(parent, folder_dates) if separator else None
+    return folder_dates[folder]
 
 
 def check_date_folder(file_paths):
@@ -25,47 +44,34 @@ def check_date_folder(file_paths):
     # initiate
     page_date_dict = {}  # dict with values (date, date_in_name)
     problem_folder = set()  # list with folders that do not contain a data and can be a problem
+    folder_dates = {}  # dict with the date per folder, every folder is resolved only once
 
     # loop through all the files to add the date per file
     for file_path in file_paths:
-        page_tree = file_path.split('/')
-        path_length = len(page_tree)
-        path_idx = path_length - 1  # start at counting 0 instead of 1
-
-        # initiate
-        date = None
-        date_in_name = False
-        date_name = None
+        folder, separator, file_name = file_path.rpartition('/')
+
+        # check whether the date is already in the file name
+        try:
+            date_name = datetime.datetime.strptime(file_name[0:10], '%Y_%m_%d').date()
+            date_in_name = True
+        except ValueError:
+            date_name = None
+            date_in_name = False
 
-        # Loop through the page_tree to find the date in the folder name
         # The date of the folder closest to the file in the structure will be used as the date of the file
         # Thus: in this tree (2019_01_01/2020_01_01/file1.html) file1 will have 2020_01_01 as date
-        while path_idx >= 0:
-
-            # try to extract the date
-            try:
-                date = datetime.datetime.strptime(page_tree[path_idx][0:10], '%Y_%m_%d').date()
-
-                # check whether the date is already in the file name
-                if path_idx == path_length - 1:  # (path_length - 1) is the file name
-                    date_in_name = True
-                    date_name = date  # in this case look further, because the date must be in folder name
-                    date = None
-                else:
-                    break
-
-
-            # if the date cannot be found in that part of the page_tree
-            except ValueError:
-                # add the the path to the problem folder set of this was the last part of the loop
-                if path_idx == 0:
-                    problem_folder.add('/'.join(file_path.split('/')[:-1]))
-
-            path_idx -= 1
+        if separator:
+            date = find_folder_date(folder, folder_dates)
+            if date is None:
+                problem_folder.add(folder)
+        else:
+            # a file without a folder is only a problem when there is no date in the name
+            date = None
+            if not date_in_name:
+                problem_folder.add('')
 
         # If for some weird case the date in the name is different form the folder. Follow the folder date.
         # The new date (folder date) will be added before the file name with the wrong date
-
         if (date_in_name is True) and (date_name != date):
             date_in_name = False
         page_date_dict[file_path] = (date, date_in_name)
@@ -112,25 +118,33 @@ def change_file_name(file_path, date, market):
     return new_file_name
 
 
-def move_file_and_folder(current_path, new_path, date, market, add_date=False):
-    """The files will be moved to the correct place in the folder
+def get_new_file_name(current_path, date, market, add_date=False):
+    """Returns the file name and the name of the accompanying folder of the file in the sorted store
     current_path is path to the current existing file
-    new_path is the path where to move to
     date is the date that belongs to the specific file
     add_date is True when the date needs to be added to the filename"""
-
-    # define the name and paths of the file and folder
-
     if add_date:
         file_name = change_file_name(current_path, date, market)
-        folder_name = '.'.join(file_name.split('.')[:-1]) + '_files'
 
     else:
         if (current_path.split('/')[-2] != date) and (current_path.split('/')[-2] != market):
             file_name = current_path.split('/')[-2] + '_' + current_path.split('/')[-1]
         else:
             file_name = current_path.split('/')[-1]
-        folder_name = '.'.join(file_name.split('.')[:-1]) + '_files'
+    folder_name = '.'.join(file_name.split('.')[:-1]) + '_files'
+
+    return file_name, folder_name
+
+
+def move_file_and_folder(current_path, new_path, date, market, add_date=False):
+    """The files will be moved to the correct place in the folder
+    current_path is path to the current existing file
+    new_path is the path where to move to
+    date is the date that belongs to the specific file
+    add_date is True when the date needs to be added to the filename"""
+
+    # define the name and paths of the file and folder
+    file_name, folder_name = get_new_file_name(current_path, date, market, add_date)
 
     current_path_file = current_path
     current_path_folder = '.'.join(current_path.split('.')[:-1]) + '_files'
@@ -186,17 +200,240 @@ def open_zip(zipfile_path):
     return new_path
 
 
-def import_files(import_path, main_target_path, delete_files=False):
+def write_zip_member(zip_ref, member, target_path):
+    """Writes a single member of the opened zipfile to the target_path, without extracting the rest of the zip"""
+    target_folder = os.path.dirname(target_path)
+    if not os.path.isdir(target_folder):
+        os.makedirs(target_folder)
+    with zip_ref.open(member) as source, open(target_path, 'wb') as target:
+        shutil.copyfileobj(source, target)
+
+
+def find_zip_asset_folders(member_list):
+    """Returns a dict {asset_folder : [members]} with the members of the '_files' folders in the zipfile
+    The asset_folder is the path of the '_files' folder in the zip, the members are the files in that folder"""
+    asset_folders = {}
+    for member in member_list:
+        if member.endswith('/'):
+            continue
+        page_tree = member.split('/')
+        for idx, folder in enumerate(page_tree[:-1]):
+            if folder.endswith('_files'):
+                asset_folder = '/'.join(page_tree[:idx + 1])
+                if asset_folder not in asset_folders:
+                    asset_folders[asset_folder] = [member]
+                else:
+                    asset_folders[asset_folder].append(member)
+                break
+    return asset_folders
+
+
+def find_duplicate(content_index, html_bytes, file_path, date_info, main_target_path, market_modules):
+    """Checks whether the page has the same content as a page of the same date in the sorted store (see ContentIndex)
+    A duplicate is recorded in the index with the path it would have in the sorted store
+    date_info is the (date, date_in_name) of the file given by check_date_folder
+    Returns the hash of the content of the page and True if the page is a duplicate"""
+    page_hash = content_hash(html_bytes, market_modules)
+    date = date_info[0].strftime('%Y_%m_%d')
+    original = content_index.find(page_hash, date)
+    if original is None:
+        return page_hash, False
+
+    # the duplicate belongs to the same market as the original (main_target_path/market/date/file)
+    market = original.split('/')[-3]
+    file_name, folder_name = get_new_file_name(file_path, date, market, add_date=not date_info[1])
+    if main_target_path + market + '/' + date + '/' + file_name != original:
+        content_index.add_duplicate(main_target_path + market + '/' + date + '/' + file_name, page_hash, original)
+    return page_hash, True
+
+
+def resume_file(journal, file_path, moved_files, json_list):
+    """Checks whether the file is already imported in this run according to the journal (see RunJournal)
+    If so, the moved file and scraped page of the file are taken from the journal
+    Returns True if the file is already imported"""
+    if journal is None or not journal.done('import', file_path):
+        return False
+    entry = journal.get('import', file_path)
+    if entry['target'] is not None:
+        moved_files.append(entry['target'])
+    # only a moved file can be scraped, its page is read from the journal file
+    if entry['status'] == 'moved':
+        record = journal.record('import', file_path)
+        if record is not None:
+            json_list.append(record)
+    return True
+
+
+def add_to_journal(journal, file_path, status, target=None, record=None):
+    """Adds the imported file to the journal of the run, if a journal is used"""
+    if journal is not None:
+        journal.add('import', file_path, status, target=target, record=record)
+
+
+def close_index(content_index):
+    """Reports the number of duplicate pages found and closes the content index"""
+    if content_index is not None:
+        print(f'{content_index.duplicates_found} duplicate pages are recorded as references instead of imported')
+        content_index.close()
+
+
+def import_zip(zipfile_path, main_target_path, delete_files=False, scrape=False, deduplicate=False, journal=None):
+    """Import function for zip files, the files are read directly from the zipfile
+    Only the vendor and product pages and their '_files' folders are written into the main_target_path, the rest
+    of the zip is never extracted
+    Parameters:
+        zipfile_path : the path to the zip file of the dump
+        main_target_path : the path where the market files are structurally stored
+        delete_files: when true the zip file will be deleted
+        scrape: when true the written pages are scraped as well (see import_files)
+        deduplicate: when true duplicate pages are not written (see import_files)
+        journal: the RunJournal of the run (see import_files)"""
+
+    # The members are handled as if the zip was extracted in a folder with the same name as the zip
+    zip_folder = zipfile_path[:-4]
+
+    with zipfile.ZipFile(zipfile_path, "r") as zip_ref:
+        # when on a mac, do not use these files
+        member_list = [member for member in sorted(zip_ref.namelist()) if not member.startswith('__MACOSX')]
+        html_members = {zip_folder + '/' + member: member for member in member_list
+                        if member.endswith((".html", ".htm"))}
+        asset_folders = find_zip_asset_folders(member_list)
+
+        # Check the date of the folder / file, and get a dict with the date per file
+        files = check_date_folder(list(html_members.keys()))
+        if files is False:
+            return 'see error above'
+
+        # import all different market modules, and start counting the markets of this dump
+        market_modules = import_market_modules()
+        MarketIdentifier.reset_market_counts()
+
+        # open the index of the content of the sorted store to find duplicate pages
+        content_index = open_index(main_target_path, market_modules) if deduplicate else None
+
+        # open the manifest of the sorted store, every page that is moved into the store is added
+        manifest = open_manifest(main_target_path)
+
+        # keep a list of written files, which need yet to be processed
+        moved_files = []
+        # keep a list of the scraped pages in json format
+        json_list = []
+
+        # keep track of amount
+        len_total_files = len(files)
+        counter = 1
+
+        for file_path in files.keys():
+            member = html_members[file_path]
+
+            # skip the files that are already imported before the run was interrupted
+            if resume_file(journal, file_path, moved_files, json_list):
+                continue
+            status, target, record = 'not imported', None, None
+
+            # get soup directly from the zip, the page is only parsed if it can be a vendor or product page
+            try:
+                html_bytes = zip_ref.read(member)
+                # a page with the same content as a page in the sorted store is not written and parsed again
+                if content_index is not None:
+                    page_hash, duplicate = find_duplicate(content_index, html_bytes, file_path, files[file_path],
+                                                          main_target_path, market_modules)
+                    if duplicate:
+                        add_to_journal(journal, file_path, 'duplicate')
+                        continue
+                soup_file, market, page_type = identify_page(html_bytes, market_modules)
+            except UnicodeDecodeError:
+                print('UnicodeDecodeError')
+                print(file_path)
+                continue
+            except:
+                print('This should not be printed, this a problem')
+                print(file_path)
+                continue
+
+            if (market is not False) and (market is not None):
+
+                # We are only interested in vendor and product pages
+                if (page_type == 'vendor') or (page_type == 'product'):
+
+                    # create date and market folder if not existing
+                    date = files[file_path][0].strftime('%Y_%m_%d')
+                    create_market_folder(main_target_path, market)
+                    new_path = create_date_folder(main_target_path, market, date)
+
+                    # write the file and the folder
+                    file_name, folder_name = get_new_file_name(file_path, date, market,
+                                                               add_date=not files[file_path][1])
+                    if os.path.isfile(new_path + file_name):
+                        print('The file you try to import, already exists in the database')
+                        print(file_path)
+                        print('The current folder in the database will be kept, you can ignore this message')
+                        print(' ')
+                        status = 'exists'
+                    else:
+                        write_zip_member(zip_ref, member, new_path + file_name)
+                        moved_files.append(new_path + file_name)
+                        manifest.add(new_path + file_name)
+                        if content_index is not None:
+                            content_index.add_page(page_hash, market, date, new_path + file_name)
+                        status, target = 'moved', new_path + file_name
+
+                        # scrape the page with the soup that is already created
+                        if scrape:
+                            page = create_page(new_path + file_name, soup_file, market, page_type, market_modules)
+                            record = page_to_json(page)
+                            json_list.append(record)
+
+                        # write the accompanying folder and files
+                        asset_folder = '.'.join(member.split('.')[:-1]) + '_files'
+                        if asset_folder in asset_folders and not os.path.isdir(new_path + folder_name):
+                            for asset in asset_folders[asset_folder]:
+                                write_zip_member(zip_ref, asset,
+                                                 new_path + folder_name + asset[len(asset_folder):])
+
+            add_to_journal(journal, file_path, status, target, record)
+
+            counter += 1
+            if counter % (len_total_files / 100) == 0:
+                print(counter/len_total_files)
+
+    close_index(content_index)
+    report_unmatched_pages()
+    manifest.close()
+
+    # end with removing the zip file
+    if delete_files:
+        os.remove(zipfile_path)
+    # return a list of the written files, and the scraped pages with their prices converted if scraped
+    if scrape:
+        return moved_files, normalize_prices(json_list)
+    return moved_files
+
+
+def import_files(import_path, main_target_path, delete_files=False, stream_zip=False, scrape=False, deduplicate=False,
+                 journal=None):
     """Main import function
     Parameters:
         import_path : the path to where the files currently are
         main_target_path : the path where the market files are structurally stored
-        delete_files: when true the folder in the path will be deleted"""
+        delete_files: when true the folder in the path will be deleted
+        stream_zip: when true a zip file is read directly, without extracting it first (see import_zip)
+        scrape: when true the moved pages are scraped with the soup created for the import, thus every page is parsed
+        only once. A tuple (moved_files, json_list) is returned, json_list has the same format as Scraper.json
+        deduplicate: when true a page with the same content as a page of the same date in the sorted store (apart
+        from the volatile parts, see ContentIndex) is not moved and parsed, it is recorded as a reference to that page
+        journal: the RunJournal of the run, every imported file is added to it. When an interrupted run is resumed with
+        the same journal, the files that are already imported are skipped"""
 
     # check whether folder or zip exists
     if not os.path.isdir(import_path) and not zipfile.is_zipfile(import_path):
         return 'The folder of file does not exist, or your path is wrong'
 
+    # If path is to a zip, read the zip directly
+    if zipfile.is_zipfile(import_path) and stream_zip:
+        return import_zip(import_path, main_target_path, delete_files=delete_files, scrape=scrape,
+                          deduplicate=deduplicate, journal=journal)
+
     # If path is to a string, extract zip and continue with folder
     if zipfile.is_zipfile(import_path):
         import_path = open_zip(import_path)
@@ -206,22 +443,49 @@ def import_files(import_path, main_target_path, delete_files=False):
     # Check the date of the folder / file, and get a dict with the date per file
     files = check_date_folder(file_paths)
 
-    # import all different market modules
+    # import all different market modules, and start counting the markets of this dump
     market_modules = import_market_modules()
-
+    MarketIdentifier.reset_market_counts()
 
     if files is not False:
+        # open the index of the content of the sorted store to find duplicate pages
+        content_index = open_index(main_target_path, market_modules) if deduplicate else None
+
+        # open the manifest of the sorted store, every page that is moved into the store is added
+        manifest = open_manifest(main_target_path)
+
         # keep a list of moved files, which need yet to be processed
         moved_files = []
+        # keep a list of the scraped pages in json format
+        json_list = []
+
+        # the files that are moved before the run was interrupted are not in the import folder anymore
+        if journal is not None:
+            for file_path in journal.paths('import'):
+                if file_path.startswith(import_path) and file_path not in files:
+                    resume_file(journal, file_path, moved_files, json_list)
 
         #keep track of amount
         len_total_files = len(files)
         counter = 1
 
         for file_path in files.keys():
-            # get soup
+            # skip the files that are already imported before the run was interrupted
+            if resume_file(journal, file_path, moved_files, json_list):
+                continue
+            status, target, record = 'not imported', None, None
+
+            # get soup, the page is only parsed if it can be a vendor or product page
             try:
-                soup_file = get_soup(file_path)
+                html_bytes = read_bytes(file_path)
+                # a page with the same content as a page in the sorted store is not moved and parsed again
+                if content_index is not None:
+                    page_hash, duplicate = find_duplicate(content_index, html_bytes, file_path, files[file_path],
+                                                          main_target_path, market_modules)
+                    if duplicate:
+                        add_to_journal(journal, file_path, 'duplicate')
+                        continue
+                soup_file, market, page_type = identify_page(html_bytes, market_modules)
             except UnicodeDecodeError:
                 print('UnicodeDecodeError')
                 print(file_path)
@@ -232,14 +496,8 @@ def import_files(import_path, main_target_path, delete_files=False):
 
                 continue
 
-            # determine market
-            market = determine_market(soup_file)
-
             if (market is not False) and (market is not None):
 
-                # determine page_type
-                page_type = market_modules[market].pagetype(soup_file)
-
                 # We are only interested in vendor and product pages
                 if (page_type == 'vendor') or (page_type == 'product'):
 
@@ -252,23 +510,55 @@ def import_files(import_path, main_target_path, delete_files=False):
                     moved_file = move_file_and_folder(file_path, new_path, date, market, add_date=not files[file_path][1])
                     if moved_file is not None:
                         moved_files.append(moved_file)
+                        manifest.add(moved_file)
+                        if content_index is not None:
+                            content_index.add_page(page_hash, market, date, moved_file)
+                        status, target = 'moved', moved_file
+
+                        # scrape the page with the soup that is already created
+                        if scrape:
+                            page = create_page(moved_file, soup_file, market, page_type, market_modules)
+                            record = page_to_json(page)
+                            json_list.append(record)
+                    else:
+                        status = 'exists'
+
+            add_to_journal(journal, file_path, status, target, record)
 
             counter += 1
             if counter % (len_total_files / 100) == 0:
                 print(counter/len_total_files)
 
-
+        close_index(content_index)
+        report_unmatched_pages()
+        manifest.close()
 
         # end with removing the folder
         if delete_files:
             shutil.rmtree(import_path)
-        # return a list of the moved files
+        # return a list of the moved files, and the scraped pages with their prices converted if scraped
+        if scrape:
+            return moved_files, normalize_prices(json_list)
         return moved_files
     # return error if the something went wrong in finding the paths
     else:
         return 'see error above'
 
 
+def import_and_scrape(import_path, main_target_path, delete_files=False, stream_zip=False, deduplicate=False,
+                      journal=None):
+    """Imports the files and scrapes the imported pages in one pass, every page is parsed only once
+    Parameters are the same as import_files
+    Returns a list of pages in json format (same as Scraper.json), that can be used by Merge.merge_items"""
+    result = import_files(import_path, main_target_path, delete_files=delete_files, stream_zip=stream_zip,
+                          scrape=True, deduplicate=deduplicate, journal=journal)
+
+    # return the error if something went wrong
+    if type(result) == str:
+        return result
+    return result[1]
+
+
 class Test:
     def test(self, value):
         print(value)
@@ -0,0 +1,109 @@
+"""
+manifest
+This module is part of ANITA
+
+This module contains the manifest of the sorted store: a SQLite file in the sorted store with the path, size,
+modification time, market and date of every page in the store (main_target_path/market/date/page).
+The manifest is updated by the import for every page that is moved into the store, thus the later stages can query the
+manifest for the pages of a market or date instead of scanning the store again.
+"""
+
+import os
+import sqlite3
+from .Scraper import scan_folder
+
+# Name of the manifest file in the sorted store
+manifest_name = 'manifest.sqlite'
+
+
+class Manifest:
+    """The pages in the sorted store with their size, modification time, market and date"""
+
+    def __init__(self, main_target_path):
+        self.main_target_path = main_target_path
+        self.connection = sqlite3.connect(os.path.join(main_target_path, manifest_name), timeout=60)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, '
+                                'mtime REAL NOT NULL, market TEXT, date TEXT)')
+        self.connection.commit()
+
+    def location(self, path):
+        """Returns the market and date of a page in the store, None for both if the page is not in a date folder"""
+        page_tree = os.path.relpath(path, self.main_target_path).split(os.sep)
+        if len(page_tree) != 3:
+            return None, None
+        return page_tree[0], page_tree[1]
+
+    def add(self, path, stat=None):
+        """Adds a page in the store to the manifest, stat is the os.stat of the page if it is already known"""
+        self.add_many([(path, stat)])
+
+    def add_many(self, pages):
+        """Adds a list of pages in the store to the manifest, as (path, stat) with stat None if not yet known"""
+        rows = []
+        for path, stat in pages:
+            if stat is None:
+                stat = os.stat(path)
+            market, date = self.location(path)
+            rows.append((path, stat.st_size, stat.st_mtime, market, date))
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO files (path, size, mtime, market, date) '
+                                        'VALUES (?, ?, ?, ?, ?)', rows)
+
+    def refresh(self):
+        """Brings the manifest up to date with the store, for pages that are added or removed outside the import
+        Only the pages of which the size or modification time changed are updated
+        Returns the number of added or changed pages and the number of removed pages"""
+        known = {path: (size, mtime) for path, size, mtime in
+                 self.connection.execute('SELECT path, size, mtime FROM files').fetchall()}
+
+        changed = []
+        for entry in scan_folder(self.main_target_path):
+            stat = entry.stat()
+            if known.pop(entry.path, None) != (stat.st_size, stat.st_mtime):
+                changed.append((entry.path, stat))
+        self.add_many(changed)
+
+        # the pages that are left are not in the store anymore
+        with self.connection:
+            self.connection.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in known])
+        return len(changed), len(known)
+
+    def paths(self, market=None, date=None):
+        """Returns the paths of the pages in the store, sorted, optionally only of the market and/or the date"""
+        query = 'SELECT path FROM files'
+        conditions, parameters = [], []
+        if market is not None:
+            conditions.append('market = ?')
+            parameters.append(market)
+        if date is not None:
+            conditions.append('date = ?')
+            parameters.append(date)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return [row[0] for row in self.connection.execute(query + ' ORDER BY path', parameters).fetchall()]
+
+    def count(self):
+        """Returns the number of pages in the manifest"""
+        return self.connection.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+
+    def markets(self):
+        """Returns the markets in the store with the dates of each market {market : [dates]}"""
+        markets = {}
+        for market, date in self.connection.execute('SELECT DISTINCT market, date FROM files WHERE market IS NOT NULL '
+                                                    'ORDER BY market, date').fetchall():
+            markets.setdefault(market, []).append(date)
+        return markets
+
+    def close(self):
+        self.connection.close()
+
+
+def open_manifest(main_target_path):
+    """Opens the manifest of the sorted store
+    When the sorted store has no manifest yet or the manifest is empty, the manifest is created with the pages that are
+    already in the store. Otherwise the store is not scanned, see Manifest.refresh to repair the manifest"""
+    new_manifest = not os.path.isfile(os.path.join(main_target_path, manifest_name))
+    manifest = Manifest(main_target_path)
+    if new_manifest or manifest.count() == 0:
+        manifest.refresh()
+    return manifest
@@ -1,103 +1,145 @@
 # ----------------------------------------------------------
 # This is a module that identifies markets
-# To add a market, add an if statement.
-# find a specific field in the page that uniquely identifies the market
+# Every market module declares a market_signature: a specific field in the page that uniquely identifies the market,
+# and a market_fingerprint: parts of the raw html that are in every page of the market. The fingerprint is only a
+# quick first check, the market of a page is always confirmed with the signature.
+# To add a market, fill these in the market module (see template). The module is found automatically.
 # ----------------------------------------------------------
 
-def identify_market(soup):
-    # BERLUSCONI MARKET
-    try:
-        if soup.find('img', {'alt': "BERLUSCONI MARKET"}): #berlusconi image in page
-            return 'berlusconi'
-    except:
-        pass
-
-    # APOLLON MARKET
-    try:
-        if 'Apollon' in soup.find('span', {'class': 'bigger-90'}).text:
-            return 'apollon'
-    except:
-        pass
-
-    # AGARTHA MARKET
-    try:
-        if 'Agartha' in soup.find('div', {'id': 'page-heading'}).text:
-            return 'agartha'
-    except: pass
+import os
+import importlib
+from bs4.element import Tag
 
-    # TOCHKA MARKET
-    try:
-        if 'Tochka' in soup.find_all('a', {'class': 'item'})[-1].text:
-            return 'tochka'
-    except:
-        pass
-
-    # DRUGSMEDICINE Market
-    try:
-        if soup.find('div', {'class': 'fix grid-3-12'}).find('img', {'id': 'logo_image'}):
-            return 'drugsmedicine'
-    except:
-        pass
+# Registry with the market modules {market_name : module}, filled by load_registry
+registry = None
 
-    # CANNAHOME Market
-    try:
-        if soup.find('img', {'alt': 'CannaHome'}): # If the image with this alt exists.
-            return 'cannahome'
-    except:
-        pass
+# Number of pages identified per market, used to check the most common markets first
+market_counts = {}
 
-    # Silk Road 3.1
-    try:
-        if 'Silk Road 3' in soup.find('div', {'id': 'd'}).text:
-            return 'silkroad3'
-    except:
-        pass
 
-    # Empire Market
-    try:
-        if 'Empire Market' in soup.find('div', {'class': 'footer'}).text:
-            return 'empiremarket'
-    except:
-        pass
+def load_registry():
+    """Imports all market modules in this folder once and returns the registry {market_name : module}"""
+    global registry
+    if registry is None:
+        registry = {}
+        folder = os.path.dirname(os.path.abspath(__file__))
+        for file in sorted(os.listdir(folder)):
+            market = file[:-3]
+            # the template and this module are not a market
+            if file.endswith('.py') and not file.startswith('__') and market not in ['template', 'MarketIdentifier']:
+                module = importlib.import_module('.' + market, __package__)
+                if hasattr(module, 'market_signature'):
+                    registry[market] = module
+    return registry
 
-    # SURFACE WEB: directdrugs
-    try:
-        if soup.find('div', {'class':'site-branding'}).find('img', {'alt':'DirectDrugs. Buy research drugs.'}):
-            return 'directdrugs'
-    except:
-        pass
 
-    # SURFACE WEB: drugscenter
-    try:
-        if soup.find('div', {'class': 'copyright-footer'}).find('strong').text == 'drugs-center.biz':
-            return 'drugscenter'
-    except:
-        pass
+def reset_market_counts():
+    """Forget the number of pages identified per market, for example when a new dump is imported"""
+    market_counts.clear()
 
-    # SURFACE WEB: palmetto
-    try:
-        if soup.find('div', {'class': 'header'}).find('strong').text == 'Palmetto State Armory':
-            return 'palmetto'
-    except:
-        pass
 
-    # cannazon
-    try:
-        if 'cannazon' in soup.find('div', {'class': 'footer-bottom'}).text.lower():
-            return 'cannazon'
-    except:
-        pass
+def count_market(market):
+    """Adds a page to the number of pages identified for the market"""
+    market_counts[market] = market_counts.get(market, 0) + 1
 
-    # darkmarket
-    try:
-        if soup.find('img', {'alt': 'DarkMarket'}):
-            return 'darkmarket'
-    except:
-        pass
 
+def ordered_markets():
+    """Returns the markets of the registry, the market that is identified most often first"""
+    return sorted(load_registry().keys(), key=lambda market: market_counts.get(market, 0), reverse=True)
 
 
+def match_tag(tag, name, attrs):
+    """Checks whether the tag has the given name and attributes, in the same way as soup.find(name, attrs)"""
+    if tag.name != name:
+        return False
+    for attribute, expected in attrs.items():
+        value = tag.get(attribute)
+        if value is None:
+            return False
+        # multi-valued attributes (class) match on one of the values or on the whole value
+        if isinstance(value, list):
+            if expected not in value and ' '.join(value) != expected:
+                return False
+        elif value != expected:
+            return False
+    return True
 
 
+def match_signature(tag, signature):
+    """Checks the tag that is found for the signature on the child and text of the signature"""
+    try:
+        if 'child' in signature:
+            tag = tag.find(signature['child']['name'], signature['child'].get('attrs', {}))
+            if tag is None:
+                return False
+
+        if 'text' not in signature:
+            return True
+
+        match = signature.get('match', 'contains')
+        if match == 'equals':
+            return tag.text == signature['text']
+        if match == 'lower':
+            return signature['text'] in tag.text.lower()
+        return signature['text'] in tag.text
+    except:
+        return False
 
 
+def identify_market(soup):
+    """Identifies the market of the soup with the market signatures of all markets in a single walk of the tree
+    Returns the name of the market or None if no market is found"""
+    markets = ordered_markets()
+    signatures = {market: registry[market].market_signature for market in markets}
+
+    # markets of which the first matching tag is not found yet, and the last matching tag per market
+    pending = [market for market in markets if signatures[market].get('position', 'first') == 'first']
+    last_tags = {market: None for market in markets if signatures[market].get('position', 'first') == 'last'}
+
+    for tag in soup.descendants:
+        if not isinstance(tag, Tag):
+            continue
+
+        # The first matching tag decides for these markets, like soup.find
+        for market in list(pending):
+            signature = signatures[market]
+            if match_tag(tag, signature['name'], signature.get('attrs', {})):
+                pending.remove(market)
+                if match_signature(tag, signature):
+                    count_market(market)
+                    return market
+
+        # For these markets the last matching tag decides
+        for market in last_tags:
+            signature = signatures[market]
+            if match_tag(tag, signature['name'], signature.get('attrs', {})):
+                last_tags[market] = tag
+
+    for market in last_tags:
+        if last_tags[market] is not None and match_signature(last_tags[market], signatures[market]):
+            count_market(market)
+            return market
+
+    return None
+
+
+def confirm_market(soup, market):
+    """Checks the market signature of the market in the soup, used when the market is found with its fingerprint
+    Returns True if the soup has the signature"""
+    signature = load_registry()[market].market_signature
+    if signature.get('position', 'first') == 'last':
+        tags = soup.find_all(signature['name'], signature.get('attrs', {}))
+        tag = tags[-1] if tags else None
+    else:
+        tag = soup.find(signature['name'], signature.get('attrs', {}))
+    if tag is None or not match_signature(tag, signature):
+        return False
+    count_market(market)
+    return True
+
+
+def identify_market_bytes(html_bytes):
+    """Returns a list of the markets of which a fingerprint is found in the raw html
+    An empty list means the page does not belong to any known market"""
+    return [market for market in ordered_markets()
+            if any(fingerprint in html_bytes for fingerprint in registry[market].market_fingerprint)]
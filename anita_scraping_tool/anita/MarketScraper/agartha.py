@@ -1,5 +1,6 @@
 # -- IMPORT
 from datetime import datetime
+from bs4 import SoupStrainer
 
 # -- MAIN PAGE DATA
 def pagetype(soup):
@@ -17,6 +18,20 @@ def pagetype(soup):
         pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'div', 'attrs': {'id': 'page-heading'}, 'text': 'Agartha'}
+
+# Parts of the raw html of which one must be in every page of the market
+market_fingerprint = [b'Agartha']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+page_fingerprint = {'product': [b'Listings'], 'vendor': [b'user-class-hint']}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 #-- PRODUCT CODE
 def p_product_name(soup):
     return soup.find('h2').text
@@ -1,5 +1,6 @@
 '''This is the specific file for the Berlusconi market that will be used by the main scraper'''
 from datetime import datetime
+from bs4 import SoupStrainer
 
 def pagetype(soup):
     '''Define how to distinghuis vendor pages from product pages'''
@@ -15,6 +16,21 @@ def pagetype(soup):
     except:
         pass
 
+
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'img', 'attrs': {'alt': 'BERLUSCONI MARKET'}}
+
+# Parts of the raw html of which one must be in every page of the market
+market_fingerprint = [b'BERLUSCONI MARKET']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+page_fingerprint = {'product': [b'Buy Now'], 'vendor': [b'label label-primary']}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 #-- PRODUCT CODE
 def p_product_name(soup):
     '''Returns the name of the product'''
@@ -6,6 +6,7 @@
 
 # -- IMPORT
 from dateutil.parser import parse
+from bs4 import SoupStrainer
 
 
 # -- MAIN PAGE DATA
@@ -32,6 +33,20 @@ def pagetype(soup):
         pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'img', 'attrs': {'alt': 'CannaHome'}}
+
+# Parts of the raw html of which one must be in every page of the market
+market_fingerprint = [b'CannaHome']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+page_fingerprint = {'product': [b'Order Product'], 'vendor': [b'View All Vendor']}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 # -- PRODUCT DATA
 def p_product_name(soup):
     """ Return the name of the product as string """
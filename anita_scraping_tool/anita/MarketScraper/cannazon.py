@@ -7,6 +7,7 @@
 # -- IMPORT
 # from datetime import datetime
 from dateutil.parser import parse
+from bs4 import SoupStrainer
 
 
 # -- MAIN PAGE DATA
@@ -29,6 +30,20 @@ def pagetype(soup):
         pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'div', 'attrs': {'class': 'footer-bottom'}, 'text': 'cannazon', 'match': 'lower'}
+
+# Parts of the raw html of which one must be in every page of the market
+market_fingerprint = [b'cannazon', b'Cannazon', b'CANNAZON']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+page_fingerprint = {'product': [b'Product Details'], 'vendor': [b'Vendor Profile']}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 # -- PRODUCT DATA
 def p_product_name(soup):
     """ Return the name of the product as string """
@@ -4,7 +4,9 @@
 
 # -- IMPORT
 # from datetime import datetime
+import re
 from dateutil.parser import parse
+from bs4 import SoupStrainer
 
 
 # -- MAIN PAGE DATA
@@ -27,6 +29,24 @@ def pagetype(soup):
         pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'img', 'attrs': {'alt': 'DarkMarket'}}
+
+# Parts of the raw html of which one must be in every page of the market
+market_fingerprint = [b'DarkMarket']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+# 'cart' and 'Vendor' are on most pages, only a 'cart' after the column of the product and a 'Vendor' in the
+# breadcrumb are part of the page types (see pagetype)
+page_fingerprint = {'product': [re.compile(rb'<div[^>]*class=["\']?[^"\'>]*\bcol-md-7\b[^>]*>.*?cart', re.DOTALL)],
+                    'vendor': [re.compile(rb'<ol[^>]*class=["\']?[^"\'>]*\bbreadcrumb\b[^>]*>(?:(?!</ol>).)*?Vendor',
+                                          re.DOTALL)]}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 # -- PRODUCT DATA
 def p_product_name(soup):
     """ Return the name of the product as string """
@@ -6,6 +6,7 @@
 
 # -- IMPORT
 from dateutil.parser import parse
+from bs4 import SoupStrainer
 
 # -- MAIN PAGE DATA
 def pagetype(soup):
@@ -27,6 +28,21 @@ def pagetype(soup):
     #     pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'div', 'attrs': {'class': 'site-branding'},
+                    'child': {'name': 'img', 'attrs': {'alt': 'DirectDrugs. Buy research drugs.'}}}
+
+# Parts of the raw html of which one must be in every page of the market
+market_fingerprint = [b'DirectDrugs. Buy research drugs.']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+page_fingerprint = {'product': [b'add-to-cart']}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 # -- PRODUCT DATA
 def p_product_name(soup):
     """ Return the name of the product as string """
@@ -1,3 +1,7 @@
+# -- IMPORT
+from bs4 import SoupStrainer
+
+
 def pagetype(soup):
     """Define how to distinguish vendor pages from product pages"""
     try:
@@ -13,6 +17,21 @@ def pagetype(soup):
         pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'div', 'attrs': {'class': 'fix grid-3-12'},
+                    'child': {'name': 'img', 'attrs': {'id': 'logo_image'}}}
+
+# Parts of the raw html of which one must be in every page of the market, the name of the site ends the title
+market_fingerprint = [b'| Drugmarket']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+page_fingerprint = {'product': [b'Item info:'], 'vendor': [b'Vendor stats:']}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 # -- PRODUCT CODE
 def p_product_name(soup):
     return soup.find('div', {"content grid-8-12"}).find('h3').text
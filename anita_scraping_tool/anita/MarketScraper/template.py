@@ -6,6 +6,7 @@
 
 # -- IMPORT
 from datetime import datetime
+from bs4 import SoupStrainer
 
 # -- MAIN PAGE DATA
 def pagetype(soup):
@@ -27,6 +28,46 @@ def pagetype(soup):
         pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market, a dict with the keys:
+#   'name': the tag to find, 'attrs': the attributes of the tag
+#   'position' (optional): 'first' (default) or 'last' tag that matches name and attrs
+#   'child' (optional): dict with 'name' and 'attrs' of a tag to find inside the tag
+#   'text' (optional): text that the tag (or child) must contain, without text the tag only has to exist
+#   'match' (optional): how to compare the text, 'contains' (default), 'equals' or 'lower' (contains, lowercase)
+# example: {'name': 'div', 'attrs': {'class': 'footer'}, 'text': 'Empire Market'}
+market_signature = {'name': None, 'attrs': {}}  # Replace None
+
+# Parts of the raw html of which one must be in every page of the market (in bytes). When the fingerprints of only
+# this market are found, the page is parsed with parse_only and the market is confirmed with the market_signature.
+# A page without fingerprints is parsed in full and identified with the market_signature (slower, but not lost).
+# example: [b'Empire Market']
+market_fingerprint = []  # Fill the list
+
+# Parts of the raw html that must be in the page for each page type, used together with the market_fingerprint.
+# Give for every page type a list of strings (in bytes), the page can be of that type if one of them is in the html.
+# Use parts that are specific to the page type of the market, such as the headers the pagetype function looks for.
+# When a string alone is not specific enough, a compiled regular expression (in bytes) can be given instead.
+# example: {'product': [b'Item info:'], 'vendor': [b'Vendor stats:']}
+page_fingerprint = {'product': [], 'vendor': []}  # Fill the lists
+
+# Parts of the page that are parsed when the market is known, as a SoupStrainer. Only the parts given here are
+# in the soup, make sure all functions below can find their data in these parts. None to parse the whole page.
+# Only used with the lxml parser, html.parser is slower with a SoupStrainer and parses the whole page instead.
+# example: SoupStrainer('body')
+parse_only = SoupStrainer('body')
+
+# (optional) True when the pagetype function needs parts of the page that parse_only leaves out. A page of which the
+# type is not found in the parsed parts is then parsed again in full, otherwise a page is parsed only once.
+pagetype_full_page = False
+
+# (optional) Parts of the raw html that change every time the same page is saved, such as tokens and timestamps, as a
+# list of compiled regular expressions (in bytes). They are ignored when duplicate pages are found (see ContentIndex),
+# CSRF tokens and the 'saved from url' comment are already ignored for all markets.
+# example: [re.compile(rb'Server time: [0-9:]+')]
+volatile_patterns = []
+
+
 # -- PRODUCT DATA
 def p_product_name(soup):
     """ Return the name of the product as string """
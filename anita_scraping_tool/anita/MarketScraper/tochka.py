@@ -1,3 +1,7 @@
+# -- IMPORT
+from bs4 import SoupStrainer
+
+
 def pagetype(soup):
     '''Define how to distinghuis vendor pages from product pages'''
     try:
@@ -18,6 +22,20 @@ def pagetype(soup):
         pass
 
 
+# -- MARKET IDENTIFICATION (see MarketIdentifier)
+# Part of the page that uniquely identifies the market
+market_signature = {'name': 'a', 'attrs': {'class': 'item'}, 'position': 'last', 'text': 'Tochka'}
+
+# Parts of the raw html of which one must be in every page of the market
+market_fingerprint = [b'Tochka']
+
+# Parts of the raw html that must be in the page for each page type, used before the page is parsed
+page_fingerprint = {'product': [b'>Purchase</h3>'], 'vendor': [b'>About</h3>', b'>Reviews</h3>']}
+
+# Parts of the page that are parsed when the market is known, the functions below only use the body
+parse_only = SoupStrainer('body')
+
+
 # -- PRODUCT CODE
 def p_product_name(soup):
     title = soup.find('h2', {"ui dividing header"})
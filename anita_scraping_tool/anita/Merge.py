@@ -14,6 +14,7 @@ import os
 import json
 import time
 from .ImportFile import create_date_folder, create_market_folder
+from . import ColumnarExport
 
 
 def extract_time(feedback_json):
@@ -24,16 +25,24 @@ def extract_time(feedback_json):
         return None
 
 
+def feedback_key(feedback_json):
+    """Helper function for the merge_items function
+    Returns a hashable key of the feedback, feedback with the same fields and values has the same key"""
+    return tuple(sorted((field, repr(value)) for field, value in feedback_json.items()))
+
+
 def merge_items(json_list):
     """
     Merges the pages together. Multiple HTML files can contain information about one vendor or product. This function
     merges them together and returns no duplicates.
-    :param json_list: list of json files created by anita.scraper package
+    :param json_list: list of json files created by anita.scraper package, or an iterator of them such as
+    anita.scraper.iter_records, the pages are consumed one at a time
     :return: list of merged items in same format
     """
 
     # initialize
     merged_dict = {}
+    feedback_keys = {}  # {item_id : set of the keys of the feedback of the item}, to find duplicate feedback
 
     # loop through all the pages in the json_list
     for page in json_list:
@@ -79,8 +88,13 @@ def merge_items(json_list):
                 if merged_dict[item_id]['page_data']['feedback'] is None:
                     merged_dict[item_id]['page_data']['feedback'] = page['page_data']['feedback']
                 else:  # merged_dict[item_id]['page_data']['feedback'] is not None:
+                    if item_id not in feedback_keys:
+                        feedback_keys[item_id] = set(feedback_key(feedback) for feedback in
+                                                     merged_dict[item_id]['page_data']['feedback'])
                     for feedback in page['page_data']['feedback']:
-                        if feedback not in merged_dict[item_id]['page_data']['feedback']:
+                        key = feedback_key(feedback)
+                        if key not in feedback_keys[item_id]:
+                            feedback_keys[item_id].add(key)
                             merged_dict[item_id]['page_data']['feedback'].append(feedback)
 
     # Sort the feedback on date (oldest first)
@@ -169,32 +183,65 @@ def myconverter(o):
         return time.mktime(o.timetuple())
 
 
-def find_existing_json(json_export_folder, market, date, page_type):
+def list_export_dates(json_export_folder, market, page_type):
     """
-    Finds the most recent export of the JSON file for the given market and type
+    Lists the dates of the exports of the JSON files for the given market and type
     :param json_export_folder: str, path where all json files are stored
     :param market: str, name of the market
-    :param date: int (unix), the creation date of the product/vendor where a previous version is needed
     :param page_type: str (vendor or product), type of the page
-    :return: str (path) or False, returns the Path of the previous JSON file or False if None could be found
+    :return: list, the sorted dates (yyyy_mm_dd) of which an export exists
     """
     # Search in the folder of the market of the file
     path = json_export_folder + market
 
-    # Make a list of all json files
-    export_dates = sorted([os.path.join(root, name).split('/')[-2]
-                           for root, dirs, files in os.walk(path)
-                           for name in files
-                           if name.endswith((page_type + ".txt", ".json"))])
+    # Make a list of the dates with a json file, the files are in the date folders of the market
+    export_dates = []
+    if os.path.isdir(path):
+        with os.scandir(path) as date_folders:
+            for date_folder in date_folders:
+                if date_folder.is_dir():
+                    with os.scandir(date_folder.path) as files:
+                        if any(file.name.endswith((page_type + ".txt", ".json")) for file in files):
+                            export_dates.append(date_folder.name)
+    return sorted(export_dates)
+
 
-    # find the date of the most recent export compared to the current
+def previous_export_date(export_dates, date):
+    """
+    Finds the date of the most recent export compared to the given date
+    :param export_dates: list, the sorted dates of the exports (see list_export_dates)
+    :param date: str, the date (yyyy_mm_dd) where a previous version is needed
+    :return: str or None, the date of the previous export or None if None could be found
+    """
+    # when there is no export of the date itself, the last export is the most recent
     if date not in export_dates:
-        export_dates.append(date)
+        return export_dates[-1] if len(export_dates) > 0 else None
     idx = export_dates.index(date) - 1
     if idx >= 0:
+        return export_dates[idx]
+    return None
+
+
+def export_path(json_export_folder, market, date, page_type):
+    """
+    :return: str, the path of the JSON file of the market, date and page type
+    """
+    return json_export_folder + market + '/' + date + '/' + date + '_' + market + '_' + page_type + '.txt'
+
+
+def find_existing_json(json_export_folder, market, date, page_type):
+    """
+    Finds the most recent export of the JSON file for the given market and type
+    :param json_export_folder: str, path where all json files are stored
+    :param market: str, name of the market
+    :param date: int (unix), the creation date of the product/vendor where a previous version is needed
+    :param page_type: str (vendor or product), type of the page
+    :return: str (path) or False, returns the Path of the previous JSON file or False if None could be found
+    """
+    previous_date = previous_export_date(list_export_dates(json_export_folder, market, page_type), date)
+    if previous_date is not None:
         # return the most recent (previous) file
-        path = path + '/' + export_dates[idx] + '/' + export_dates[idx] + '_' + market + '_' + page_type + '.txt'
-        return path
+        return export_path(json_export_folder, market, previous_date, page_type)
     # If none could be found, return False
     return False
 
@@ -288,14 +335,151 @@ def open_current_json(file_path):
         return json.load(json_file, strict=False)
 
 
-def store_json(imported_data, json_export_folder):
+def group_items(imported_data):
+    """
+    Groups the merged items on market and date, the order of the items is kept
+    :param imported_data: dict of data files created by the merge_items function
+    :return: dict, {(market, date) : [data]}, with the date as str (yyyy_mm_dd)
+    """
+    groups = {}
+    for page in imported_data:
+        page_data = imported_data[page]
+        date, market, name, page_type = retrieve_market_and_date(page_data)
+        date = datetime.datetime.fromtimestamp(date).strftime('%Y_%m_%d')  # datetime to str object
+        groups.setdefault((market, date), []).append(page_data)
+    return groups
+
+
+def load_item_id_lists(json_export_folder, market):
+    """
+    Loads the Item_id handler files of the market, the files are created if they do not exist yet
+    :return: dict, {'item_idx', 'idx_finder', 'vendor_product_list', 'vendor_list', 'new_products'} (see
+    open_item_id_list), new_products is a list of the (vendor, name, product_id) that get an ID while storing
+    """
+    path_product_item_id = json_export_folder + '/item_id/' + market + '_ProductID.txt'
+    if os.path.isfile(path_product_item_id):
+        # opens list
+        product_idx, product_idx_finder, vendor_product_list = open_item_id_list(path_product_item_id, 'product')
+    else:
+        # creates and opens list
+        product_idx, product_idx_finder, vendor_product_list = create_product_item_id_list(path_product_item_id)
+
+    path_vendor_name_id = json_export_folder + '/item_id/' + market + '_VendorID.txt'
+    if os.path.isfile(path_vendor_name_id):
+        vendor_list = open_item_id_list(path_vendor_name_id, 'vendor')
+    else:
+        # create a new vendor_list
+        vendor_list = []
+
+    return {'item_idx': product_idx, 'idx_finder': product_idx_finder, 'vendor_product_list': vendor_product_list,
+            'vendor_list': vendor_list, 'new_products': []}
+
+
+def export_item_id_lists(json_export_folder, market, id_lists):
+    """
+    Exports the Item_id handler files of the market
+    :param id_lists: dict, the lists of the market (see load_item_id_lists)
+    """
+    # Export vendor_list, without duplicates
+    with open(json_export_folder + '/item_id/' + market + '_VendorID.txt', 'w') as outfile:
+        json.dump(list(set(id_lists['vendor_list'])), outfile)
+
+    # Export product_item dict
+    product_item_output = {
+        'item_idx': id_lists['item_idx'],
+        'idx_finder': id_lists['idx_finder'],
+        'vendor_product_list': id_lists['vendor_product_list']
+    }
+    with open(json_export_folder + '/item_id/' + market + '_ProductID.txt', 'w') as outfile:
+        json.dump(product_item_output, outfile)
+
+
+def load_export(exports, file_path, store=None, market=None, date=None, page_type=None):
+    """
+    Returns the JSON of an export file, the file is read from disk only once while it is kept in exports
+    :param exports: dict, {file_path : JSON} of the export files that are already loaded or changed
+    :param store: SnapshotStore or None, when given the export of the market, date and page_type is read from the
+    store instead of the file
+    :return: JSON or None if the file does not exist
+    """
+    if file_path not in exports:
+        if store is not None:
+            exports[file_path] = store.load_snapshot(market, date, page_type)
+        else:
+            exports[file_path] = open_current_json(file_path) if os.path.isfile(file_path) else None
+    return exports[file_path]
+
+
+def add_product(current_json, name_index, product_id, page_data):
+    """
+    Adds the product to the JSON of the export and to the (vendor, name) index of the export
+    :param name_index: dict, {(vendor, name) : number of products} of the products in the export
+    """
+    if product_id in current_json:
+        old_key = (current_json[product_id]['page_data']['vendor'], current_json[product_id]['page_data']['name'])
+        name_index[old_key] -= 1
+    current_json[product_id] = page_data
+    key = (page_data['page_data']['vendor'], page_data['page_data']['name'])
+    name_index[key] = name_index.get(key, 0) + 1
+
+
+def build_review_index(data_previous):
+    """
+    Creates an inverted index of the reviews in an export, used to find products of which the name has changed
+    :param data_previous: JSON, the products of the export
+    :return: dict, {message : set of product_ids}, the products that have a review with the message
+    """
+    review_index = {}
+    if data_previous is None:
+        return review_index
+    for product_id in data_previous:
+        feedback = data_previous[product_id]['page_data']['feedback']
+        if feedback is not None:
+            for review in feedback:
+                review_index.setdefault(review['message'], set()).add(product_id)
+    return review_index
+
+
+def find_renamed_product(page_data, vendor_name, vendor_product_list, review_index):
+    """
+    Tries to find the product in the previous export when the name of the product has changed, by matching the 5 older
+    reviews of the product with the reviews of the products of the same vendor
+    :param review_index: dict, the inverted index of the reviews in the previous export (see build_review_index)
+    :return: str or None, the product_id of the product in the previous export, None if no product matches
+    """
+    # Take five "older" reviews of this imported vendor / product
+    imported_reviews = retrieve_reviews(page_data)
+    if imported_reviews is None:
+        return None
+
+    # the products with at least one of the reviews, if more than 0 exist in both, the products are the same
+    candidates = set()
+    for review in imported_reviews:
+        candidates.update(review_index.get(review['message'], ()))
+    if len(candidates) == 0:
+        return None
+
+    # when multiple products of the vendor match, the product that is added last to the vendor is used
+    for product_id in reversed(vendor_product_list[vendor_name]):
+        if product_id in candidates:
+            return product_id
+    return None
+
+
+def store_json(imported_data, json_export_folder, store=None):
     """
     Loops through the data and checks the imported data against the stored stored JSON files.
     Determines the real IDs of the products. Provides new IDs and returns also OLD IDs.
     Exports nicely structured JSON files
+    The data is handled in groups per market and date. The stored files (Item_id handler files, JSON files of the date
+    and the previous JSON file) are read once, the IDs are determined in memory and every file is written once.
     :param imported_data: list of data files created by the merge_files function.
     :param json_export_folder: the folder where the json where the json files are stored and will be stored:
     'json_export_folder/market/date/json_flles'
+    :param store: SnapshotStore or None, when given the data and the Item_id handlers are stored in the SQLite store
+    instead of the JSON files, only the items that are added or changed are written (see SnapshotStore)
+    When the columnar export is configured, the datasets of the written exports are written as well (see
+    ColumnarExport)
     :return: boolean, True if the process is finished
     """
 
@@ -303,246 +487,152 @@ def store_json(imported_data, json_export_folder):
     if not os.path.isdir(json_export_folder):
         return 'The export folder of the json files does not exist, or your path is wrong'
 
-    # loop over the files
-    for page in imported_data:
-        page_data = imported_data[page]
+    # Item_id handler products, if folder does not exist yet: create
+    path_product_item_folder = json_export_folder + '/item_id/'
+    if store is None and not os.path.isdir(path_product_item_folder):
+        os.mkdir(path_product_item_folder)
 
-        # Retrieve market and date
-        date, market, name, page_type = retrieve_market_and_date(page_data)
-        date = datetime.datetime.fromtimestamp(date).strftime('%Y_%m_%d')  # datetime to str object
+    id_lists = {}  # {market : item id lists}
+    export_dates = {}  # {(market, page_type) : sorted dates of the exports}
 
-        # If product, then retrieve vendor name as well
-        if page_type == 'product':
-            vendor_name = page_data['page_data']['vendor']
-            if vendor_name is None:
-                vendor_name = 'NoVendorFound'
-        else:
-            vendor_name = None
+    # loop over the groups of market and date
+    for (market, date), pages in group_items(imported_data).items():
+        # the export files of a group are only used by that group, they are kept in memory until they are written at
+        # the end of the group. A later group that needs them as previous export reads them again
+        exports = {}  # {file_path : JSON} of the export files that are loaded or changed
+        name_indexes = {}  # {file_path : {(vendor, name) : number of products}} of the product export files
+        review_indexes = {}  # {file_path : {message : product_ids}} of the previous exports
 
         # Check folder of market and date, create if not exists, use function used by import
-        create_market_folder(json_export_folder, market)
-        new_path = create_date_folder(json_export_folder, market, date)
-
-        # Item_id handler products, if folder does not exist yet: create
-        path_product_item_folder = json_export_folder + '/item_id/'
-        if not os.path.isdir(path_product_item_folder):
-            os.mkdir(path_product_item_folder)
-
-        # import the Item_id handler files
-        path_product_item_id = json_export_folder + '/item_id/' + market + '_ProductID.txt'
-        if os.path.isfile(path_product_item_id):
-            # opens list
-            product_idx, product_idx_finder, vendor_product_list = open_item_id_list(path_product_item_id, 'product')
-        else:
-            # creates and opens list
-            product_idx, product_idx_finder, vendor_product_list = create_product_item_id_list(path_product_item_id)
-
-        # Vendor_names handler products
-        path_vendor_name_id = json_export_folder + '/item_id/' + market + '_VendorID.txt'
-        if os.path.isfile(path_vendor_name_id):
-            vendor_list = open_item_id_list(path_vendor_name_id, 'vendor')
-        else:
-            # create a new vendor_list
-            vendor_list = []
-
-        # check current file exists
-        json_path = new_path + date + '_' + market + '_' + page_type + '.txt'
-        if not os.path.isfile(json_path):
-            current_json_exists = False
-            current_json = None
-        else:
-            current_json_exists = True
-            current_json = open_current_json(json_path)
+        if store is None:
+            create_market_folder(json_export_folder, market)
+            create_date_folder(json_export_folder, market, date)
+
+        # import the Item_id handler files of the market once
+        if market not in id_lists:
+            if store is None:
+                id_lists[market] = load_item_id_lists(json_export_folder, market)
+            else:
+                id_lists[market] = store.load_item_id_lists(market)
+        ids = id_lists[market]
+
+        # the export files of this group with their changed items {file_path : (page_type, item_ids)}, that are
+        # written at the end of the group
+        changed_files = {}
+
+        for page_data in pages:
+            name = retrieve_name(page_data)
+            page_type = page_data['web_page']['page_type']
+
+            # If product, then retrieve vendor name as well
+            if page_type == 'product':
+                vendor_name = page_data['page_data']['vendor']
+                if vendor_name is None:
+                    vendor_name = 'NoVendorFound'
+            else:
+                vendor_name = None
 
-        # Check previous file exists
-        prev_json_exists = find_existing_json(json_export_folder, market, date, page_type)
+            # the dates of the exports of the market are listed once, and kept up to date in memory
+            if (market, page_type) not in export_dates:
+                if store is None:
+                    export_dates[(market, page_type)] = list_export_dates(json_export_folder, market, page_type)
+                else:
+                    export_dates[(market, page_type)] = store.export_dates(market, page_type)
 
-        # If the page is a vendor; follow these steps
-        if page_type == 'vendor':
+            # Check previous file exists
+            previous_date = previous_export_date(export_dates[(market, page_type)], date)
+            prev_json_exists = previous_date is not None
 
+            # check current file exists
+            json_path = export_path(json_export_folder, market, date, page_type)
+            current_json = load_export(exports, json_path, store, market, date, page_type)
+            current_json_exists = current_json is not None
             if not current_json_exists:
-                # create a new export json file for the specific date
-                export_new_json(json_path, page_data, name)
-
-                # add vendor to list
-                vendor_list.append(name)  # duplicates are removed later
-
-            if current_json_exists:
+                # the file is created for this page
+                current_json = exports[json_path] = {}
+                export_dates[(market, page_type)] = sorted(export_dates[(market, page_type)] + [date])
+            if json_path not in changed_files:
+                changed_files[json_path] = (page_type, [])
+            changed_items = changed_files[json_path][1]
+
+            # If the page is a vendor; follow these steps
+            if page_type == 'vendor':
                 # check whether vendor name is already in file, if not; add
-                if name not in current_json.keys():
-
-                    add_to_existing_json(json_path, page_data, name)
-
+                if name not in current_json:
+                    current_json[name] = page_data
+                    changed_items.append(name)
                     # add name to vendor set
-                    vendor_list.append(name)  # duplicates are removed later
+                    ids['vendor_list'].append(name)  # duplicates are removed later
+                continue
 
-                # The name of the vendor is already in the file, thus existed already
-                else:
-                    # File did exist already in the file
-                    pass
-
-
-        # If the page is a vendor; follow these steps
-        if page_type == 'product':
-            # print('________')
-            # print(name)
-            if prev_json_exists is False:
-
-                if not current_json_exists:
-                    # new id, because does not exist yet
-                    new_product_id = market + '_' + page_type + '_' + str(product_idx + 1)
-
-                    # create a new export json file
-                    export_new_json(json_path, page_data, new_product_id)
-
-                    # add to item_id
-                    product_idx, product_idx_finder, vendor_product_list = update_item_id_list(product_idx,
-                                                                                               product_idx_finder,
-                                                                                               vendor_product_list,
-                                                                                               vendor_name, name,
-                                                                                               new_product_id)
-
-                if current_json_exists:
-
-                    # Check whether the product is already in the current json
-                    existing = False  # boolean to check if the product is already in the current json
-                    for idx in current_json:
-                        if current_json[idx]['page_data']['vendor'] == vendor_name:
-                            if current_json[idx]['page_data']['name'] == name:
-                                existing = True  # The product already exists in the data
-
-                    if not existing:
-                        # new id, because does not exist yet
-                        new_product_id = market + '_' + page_type + '_' + str(product_idx + 1)
-
-                        # add to existing json
-                        add_to_existing_json(json_path, page_data, new_product_id)
-
-                        # add to list
-                        product_idx, product_idx_finder, vendor_product_list = update_item_id_list(product_idx,
-                                                                                                   product_idx_finder,
-                                                                                                   vendor_product_list,
-                                                                                                   vendor_name, name,
-                                                                                                   new_product_id)
-            # If previous JSON exists
+            # index of the (vendor, name) of the products in the current file
+            if json_path not in name_indexes:
+                name_indexes[json_path] = {}
+                for idx in current_json:
+                    key = (current_json[idx]['page_data']['vendor'], current_json[idx]['page_data']['name'])
+                    name_indexes[json_path][key] = name_indexes[json_path].get(key, 0) + 1
+            name_index = name_indexes[json_path]
+
+            # initiate product_id
+            product_name = None
+            existing = False  # boolean to check if the product is already in the previous or current JSON
+            vendor_product = vendor_name + '_' + name  # unique identifier for the product_idx_finder
+
+            if not prev_json_exists:
+                # Check whether the product is already in the current json
+                if name_index.get((vendor_name, name), 0) > 0:
+                    continue  # The product already exists in the data
+
+            # If previous JSON exists, first check if the name is the exact same
+            elif vendor_product in ids['idx_finder']:
+                product_name = ids['idx_finder'][vendor_product]
+                if product_name in current_json:
+                    continue  # same name, already in the current JSON
+                existing = True  # the name exists already in the data
+
+            # If vendor_name is known, try to match on 5 old reviews, maybe the name of the product has changed
+            elif vendor_name in ids['vendor_product_list']:
+                # the inverted index of the reviews is created once per previous export
+                prev_path = export_path(json_export_folder, market, previous_date, page_type)
+                if prev_path not in review_indexes:
+                    review_indexes[prev_path] = build_review_index(
+                        load_export(exports, prev_path, store, market, previous_date, page_type))
+                product_name = find_renamed_product(page_data, vendor_name, ids['vendor_product_list'],
+                                                    review_indexes[prev_path])
+                existing = product_name is not None
+
+            # If there is no product found that is the same, create new id
+            if product_name is None:
+                product_name = market + '_' + page_type + '_' + str(ids['item_idx'] + 1)
+
+            # add to the export file
+            add_product(current_json, name_index, product_name, page_data)
+            changed_items.append(product_name)
+
+            # add to list
+            if not existing:
+                ids['new_products'].append((vendor_name, name, product_name))
+                ids['item_idx'], ids['idx_finder'], ids['vendor_product_list'] = \
+                    update_item_id_list(ids['item_idx'], ids['idx_finder'], ids['vendor_product_list'], vendor_name,
+                                        name, product_name)
+
+        # write the export files of the group
+        for json_path, (page_type, changed_items) in changed_files.items():
+            if store is None:
+                with open(json_path, 'w') as outfile:
+                    json.dump(exports[json_path], outfile, default=myconverter)
             else:
-                if not current_json_exists:
-                    # initiate product_id
-                    product_name = None
-                    existing = False  # boolean to check if the product is already in the previous JSON
-
-                    # first check if the name is the exact same
-                    vendor_product = vendor_name + '_' + name  # unique identifier for the product_idx_finder
-                    if vendor_product in product_idx_finder:
-                        product_name = product_idx_finder[vendor_product]
-                        existing = True  # the name exists already in the data
-
-                    # If vendor_name is known, check which product_id to look into
-                    elif vendor_name in vendor_product_list:
-                        # Take five "older" reviews of this imported vendor / product
-                        imported_reviews = retrieve_reviews(page_data)
-                        # if there is no exact name, try to match on 5 old reviews, maybe the name of the
-                        # product has changes
-                        for product_id in vendor_product_list[vendor_name]:
-                            # ? if product_id does not exist in previous
-                            data_previous = open_current_json(prev_json_exists)
-                            if product_id in data_previous:
-                                prev_feedback = data_previous[product_id]['page_data']['feedback']
-                                if imported_reviews is not None and prev_feedback is not None:
-                                    feedback_counter = 0
-                                    for feedback1 in imported_reviews:
-                                        for feedback2 in prev_feedback:
-                                            if feedback1['message'] == feedback2['message']:
-                                                feedback_counter += 1
-                                    if feedback_counter > 0:  # if more than 0 exist in both, the products are the same
-                                        existing = True  # the product exists already in the data
-                                        product_name = product_id
-
-                    # If there is product found that is the same, create new id
-                    if product_name is None:
-                        # new id, because does not exist yet
-                        product_name = market + '_' + page_type + '_' + str(product_idx + 1)
-
-                    # create a new export json file
-                    export_new_json(json_path, page_data, product_name)
-
-                    # add to list
-                    if not existing:
-                        product_idx, product_idx_finder, vendor_product_list = update_item_id_list(product_idx,
-                                                                                                   product_idx_finder,
-                                                                                                   vendor_product_list,
-                                                                                                   vendor_name, name,
-                                                                                                   product_name)
-
-                if current_json_exists:
-                    # initiate product_id
-                    product_name = None
-                    existing = False  # boolean to check if the product is already in the previous or current JSON
-
-                    # check if product is already in current json file
-                    vendor_product = vendor_name + '_' + name  # unique identifier for the product_idx_finder
-                    if vendor_product in product_idx_finder:
-                        product_name = product_idx_finder[vendor_product]
-                        if product_name in current_json:
-                            pass
-                        else:
-                            # same name, not yet in current thus add
-                            # add to existing json
-                            add_to_existing_json(json_path, page_data, product_name)
-
-                    # Check whether the product name has changed
-                    elif vendor_name in vendor_product_list:
-                        # Take five "older" reviews of this imported vendor / product
-                        imported_reviews = retrieve_reviews(page_data)
-
-                        # if there is no exact name, try to match on 5 old reviews
-                        for product_id in vendor_product_list[vendor_name]:
-                            prev_feedback = open_current_json(prev_json_exists)  # [product_id]['page_data']['feedback']
-                            if product_id in prev_feedback:
-                                prev_feedback = prev_feedback[product_id]['page_data']['feedback']
-                                if imported_reviews is not None and prev_feedback is not None:
-                                    feedback_counter = 0
-                                    for feedback1 in imported_reviews:
-                                        for feedback2 in prev_feedback:
-                                            if feedback1['message'] == feedback2['message']:
-                                                feedback_counter += 1
-                                    if feedback_counter > 0:
-                                        product_name = product_id
-                                        existing = True
-                                        continue  # will break the loop and continues
-
-                        # new id, because does not exist yet
-                        if product_name is None:
-                            product_name = market + '_' + page_type + '_' + str(product_idx + 1)
-
-                        # create a new export json file
-                        add_to_existing_json(json_path, page_data, product_name)
-                        # add to list
-                        if not existing:
-                            product_idx, product_idx_finder, vendor_product_list = \
-                                update_item_id_list(product_idx, product_idx_finder, vendor_product_list, vendor_name,
-                                                    name, product_name)
-
-                    # When the vendor is completely new and was never recorded before
-                    else:
-                        product_name = market + '_' + page_type + '_' + str(product_idx + 1)
-                        add_to_existing_json(json_path, page_data, product_name)
-                        product_idx, product_idx_finder, vendor_product_list = \
-                            update_item_id_list(product_idx, product_idx_finder, vendor_product_list, vendor_name,
-                                                name, product_name)
-
-        # Export vendor_list
-        vendor_list = list(set(vendor_list))
-        with open(path_vendor_name_id, 'w') as outfile:
-            json.dump(vendor_list, outfile)
-
-        # Export product_item dict
-        product_item_output = {
-            'item_idx': product_idx,
-            'idx_finder': product_idx_finder,
-            'vendor_product_list': vendor_product_list
-        }
-        with open(path_product_item_id, 'w') as outfile:
-            json.dump(product_item_output, outfile)
+                store.store_snapshot(market, date, page_type,
+                                     {item_id: exports[json_path][item_id] for item_id in changed_items})
+            # the columnar datasets, only the partitions of this market and date are written again
+            if ColumnarExport.export_folder is not None:
+                ColumnarExport.export_snapshot(market, date, page_type, exports[json_path])
+
+    # Export the Item_id handler files
+    for market in id_lists:
+        if store is None:
+            export_item_id_lists(json_export_folder, market, id_lists[market])
+        else:
+            store.store_item_id_lists(market, id_lists[market])
 
     return True
@@ -0,0 +1,113 @@
+"""
+parse cache
+This module is part of ANITA
+
+This module contains the on-disk cache of the scraped pages, used to skip the parsing of pages that were scraped before.
+A page is stored in a SQLite file under the SHA-256 of its html, together with the date of the file and the parsers
+used. With the page the version of the scraper that scraped it is stored: a hash of the source of the scraper and of
+every market module. The market of a page is identified with the signatures and fingerprints of all market modules, thus
+a change to any market module, or an added market module, changes the version. A page is only taken from the cache when
+the version is still the same, thus only pages of which the content or the scraper code changed are parsed again.
+"""
+
+import os
+import pickle
+import sqlite3
+import hashlib
+
+# Path of the SQLite file of the cache, None when the cache is not used
+cache_path = None
+
+# The cache of this process, opened by get_cache
+cache = None
+
+# The version of the scraper of this process, set by scraper_version
+version = None
+
+# The folder of the scraper, the source of Scraper.py and of every module in MarketScraper is part of the version
+scraper_folder = os.path.dirname(os.path.abspath(__file__))
+
+
+class PageCache:
+    """Scraped pages in a SQLite file, stored per key with the market and the version of the market module"""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, market TEXT NOT NULL, '
+                                'version TEXT NOT NULL, record BLOB NOT NULL)')
+        self.connection.commit()
+
+    def get(self, key):
+        """Returns (market, version, record) of the key, or None if the key is not in the cache"""
+        row = self.connection.execute('SELECT market, version, record FROM pages WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], pickle.loads(row[2])
+
+    def put(self, key, market, version, record):
+        """Stores the record of the key, a previous record of the key is replaced"""
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO pages (key, market, version, record) VALUES (?, ?, ?, ?)',
+                                    (key, market, version, pickle.dumps(record)))
+
+    def close(self):
+        self.connection.close()
+
+
+def configure(path):
+    """Sets the path of the cache file, None to stop using the cache"""
+    global cache_path
+    cache_path = path
+
+
+def get_cache():
+    """Returns the cache of this process, and opens it if needed"""
+    global cache
+    # A cache opened by another process (before a fork) cannot be used
+    if cache is None or cache.pid != os.getpid() or cache.path != cache_path:
+        cache = PageCache(cache_path)
+    return cache
+
+
+def source_files():
+    """Returns the paths of the source files of the version: Scraper.py and every module in MarketScraper"""
+    market_folder = os.path.join(scraper_folder, 'MarketScraper')
+    return [os.path.join(scraper_folder, 'Scraper.py')] + \
+        [os.path.join(market_folder, file) for file in sorted(os.listdir(market_folder)) if file.endswith('.py')]
+
+
+def scraper_version():
+    """Returns the version of the scraper: a hash of the names and the source of the source files"""
+    global version
+    if version is None:
+        source_hash = hashlib.sha256()
+        for file_path in source_files():
+            source_hash.update(os.path.basename(file_path).encode() + b'\0')
+            with open(file_path, 'rb') as source:
+                source_hash.update(hashlib.sha256(source.read()).digest())
+        version = source_hash.hexdigest()
+    return version
+
+
+def page_key(html_bytes, date, parsers):
+    """Returns the key of a page: the hash of the html, the date of the file (unix) and the parsers used"""
+    return hashlib.sha256(html_bytes).hexdigest() + '_' + str(int(date)) + '_' + '_'.join(str(p) for p in parsers)
+
+
+def load(key, market_modules):
+    """Returns the cached record of the key, or None if it is not cached or the scraper has changed since"""
+    cached = get_cache().get(key)
+    if cached is None:
+        return None
+    market, record_version, record = cached
+    if market not in market_modules or record_version != scraper_version():
+        return None
+    return record
+
+
+def store(key, record):
+    """Stores the record of the key with the version of the scraper that scraped it"""
+    get_cache().put(key, record['web_page']['market'], scraper_version(), record)
@@ -0,0 +1,124 @@
+"""
+price normalizer
+This module is part of ANITA
+
+This module contains the conversion of the scraped prices into euro's.
+The conversion is not part of the scraping of a page, it is done afterwards for all pages of a run at once:
+all (amount, currency, date) triples are collected, every distinct exchange rate is looked up once in the exchange
+rate store and the prices in euro's are calculated with NumPy arrays.
+
+The prices are converted in three different ways:
+    1. The price is already in euros, keep it that way
+    2. The price is in dollars, will be converted to euro's with the rate of the date of the file
+    3. The price is in bitcoin, bitcoin will be converted to dollars and dollars to euro's
+"""
+
+import re
+import datetime
+import numpy as np
+from . import ExchangeRates
+
+# Everything that is not part of the amount of a price
+not_amount = re.compile(r'[^0-9.]')
+
+
+def parse_price(price):
+    """Returns the amount and currency ('EUR', 'USD' or 'BTC') of a price text, or None if it is not a known price"""
+    if type(price) != str:
+        return None
+
+    if ('usd' in price.lower()) or ('$' in price):
+        currency = 'USD'
+    elif ('eur' in price.lower()) or ('€' in price):
+        currency = 'EUR'
+    elif '฿' in price:
+        currency = 'BTC'
+    else:
+        return None
+
+    try:
+        return float(not_amount.sub('', price)), currency
+    except:
+        return None
+
+
+def collect_prices(json_list):
+    """Collects the prices of all product pages in the json_list
+    Returns a list of targets (page_data, key) with the key of the price dict or None for a single price,
+    and the lists of amounts, currencies and dates (unix time) of the prices that can be converted"""
+    targets, amounts, currencies, dates = [], [], [], []
+    for page in json_list:
+        page_data = page['page_data']
+        if page_data is None or 'price_eur' not in page_data:
+            continue
+
+        price = page_data['price']
+        if type(price) == dict:
+            page_data['price_eur'] = {item: None for item in price}
+            prices = [(item, price[item]) for item in price]
+        else:
+            page_data['price_eur'] = None
+            prices = [(None, price)]
+
+        for key, price_text in prices:
+            parsed = parse_price(price_text)
+            if parsed is None:
+                continue
+            targets.append((page_data, key))
+            amounts.append(parsed[0])
+            currencies.append(parsed[1])
+            dates.append(page['web_page']['date'])
+    return targets, amounts, currencies, dates
+
+
+def resolve_rates(pair, days, used):
+    """Returns an array with the rate of the pair for every day, only the days with an index in used are looked up
+    The rate is NaN if it is not looked up or cannot be found"""
+    rates = np.full(len(days), np.nan)
+    for idx in used:
+        rate = ExchangeRates.get_rate(pair, days[idx])
+        if rate is None:
+            print(f'error: No {pair} exchange rate found for {days[idx]}')
+        else:
+            rates[idx] = rate
+    return rates
+
+
+def convert_prices(amounts, currencies, dates):
+    """Converts the amounts in the currencies on the dates (unix time) into euro's
+    Returns an array with the prices in euro's rounded to cents, NaN if a rate is missing"""
+    amounts = np.array(amounts, dtype=float)
+    currencies = np.array(currencies)
+
+    # Every distinct date is converted and looked up only once
+    unique_dates, date_idx = np.unique(np.array(dates, dtype=float), return_inverse=True)
+    days = [datetime.datetime.fromtimestamp(date).date() for date in unique_dates]
+
+    is_btc = currencies == 'BTC'
+    is_eur = currencies == 'EUR'
+    btc_usd = resolve_rates('BTC/USD', days, np.unique(date_idx[is_btc]))
+    eur_usd = resolve_rates('EUR/USD', days, np.unique(date_idx[~is_eur]))
+
+    # bitcoin to dollars, rounded to cents as the dollar price, then dollars to euro's
+    dollars = np.where(is_btc, np.round(amounts * btc_usd[date_idx], 2), amounts)
+    euros = np.where(is_eur, amounts, dollars / eur_usd[date_idx])
+    return np.round(euros, 2)
+
+
+def normalize_prices(json_list):
+    """Fills in the price in euro's (price_eur) of all product pages in the json_list, the json_list is changed in place
+    A price of which the currency is unknown or of which the exchange rate is missing stays None
+    Returns the json_list"""
+    targets, amounts, currencies, dates = collect_prices(json_list)
+    if len(targets) == 0:
+        return json_list
+
+    euros = convert_prices(amounts, currencies, dates).tolist()
+    for (page_data, key), euro in zip(targets, euros):
+        if euro != euro:  # NaN, the rate is missing
+            continue
+        if key is None:
+            page_data['price_eur'] = euro
+        else:
+            page_data['price_eur'][key] = euro
+    return json_list
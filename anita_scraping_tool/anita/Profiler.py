@@ -0,0 +1,121 @@
+"""
+profiler
+This module is part of ANITA
+
+This module contains the opt-in profiler of the market scrapers.
+When the profiler is enabled, every call of a field function of a market module (p_feedback, v_pgp, p_info, ...) made
+by the Product and Vendor classes is timed. Per (market, field) the number of calls, the number of failures and the
+wall time of the calls are recorded, and can be printed as a report or exported as JSON at the end of a run.
+"""
+
+import json
+import time
+import numpy as np
+
+# When True the field functions of the market modules are profiled, see enable
+enabled = False
+
+# The recorded calls {(market, field) : {'durations': [seconds], 'failures': int}}
+stats = {}
+
+
+def enable(profile=True):
+    """Turns the profiling of the market scrapers on (or off)"""
+    global enabled
+    enabled = profile
+
+
+def reset():
+    """Forgets all recorded calls"""
+    stats.clear()
+
+
+def record(market, field, duration, failed):
+    """Records a call of the field function of the market"""
+    if (market, field) not in stats:
+        stats[(market, field)] = {'durations': [], 'failures': 0}
+    stats[(market, field)]['durations'].append(duration)
+    if failed:
+        stats[(market, field)]['failures'] += 1
+
+
+def take():
+    """Returns the recorded calls and forgets them, used to send the calls of a worker process to the main process"""
+    taken = dict(stats)
+    stats.clear()
+    return taken
+
+
+def merge(other_stats):
+    """Adds the recorded calls of another process (see take) to the recorded calls of this process"""
+    for key, other in other_stats.items():
+        if key not in stats:
+            stats[key] = {'durations': [], 'failures': 0}
+        stats[key]['durations'].extend(other['durations'])
+        stats[key]['failures'] += other['failures']
+
+
+class ProfiledScraper:
+    """Stands in for a market module, the field functions (p_ and v_) of the module are timed on every call"""
+
+    def __init__(self, module, market):
+        self.module = module
+        self.market = market
+
+    def __getattr__(self, name):
+        attribute = getattr(self.module, name)
+        if not callable(attribute) or not (name.startswith('p_') or name.startswith('v_')):
+            return attribute
+
+        def profiled_field(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except:
+                record(self.market, name, time.perf_counter() - start, True)
+                raise
+            record(self.market, name, time.perf_counter() - start, False)
+            return result
+
+        return profiled_field
+
+
+def profiled(module, market):
+    """Returns the market module itself, or a profiled stand-in of the module if the profiler is enabled"""
+    if enabled:
+        return ProfiledScraper(module, market)
+    return module
+
+
+def summary():
+    """Returns a list with a summary per (market, field), the field that takes the most time in total first
+    Every summary is a dict {'market', 'field', 'calls', 'failures', 'total_s', 'mean_ms', 'p95_ms'}"""
+    rows = []
+    for (market, field), stat in stats.items():
+        durations = np.array(stat['durations'])
+        rows.append({
+            'market': market,
+            'field': field,
+            'calls': len(durations),
+            'failures': stat['failures'],
+            'total_s': float(durations.sum()),
+            'mean_ms': float(1000 * durations.mean()),
+            'p95_ms': float(1000 * np.percentile(durations, 95))})
+    return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+
+def print_report(top=None):
+    """Prints a table with the summary per (market, field), top is the number of rows shown, None to show all"""
+    rows = summary()
+    if top is not None:
+        rows = rows[:top]
+    print(f'{"market":<16}{"field":<20}{"calls":>8}{"failures":>10}{"total s":>10}{"mean ms":>10}{"p95 ms":>10}')
+    for row in rows:
+        print(f'{row["market"]:<16}{row["field"]:<20}{row["calls"]:>8}{row["failures"]:>10}{row["total_s"]:>10.3f}'
+              f'{row["mean_ms"]:>10.3f}{row["p95_ms"]:>10.3f}')
+
+
+def export_json(file_path):
+    """Exports the summary per (market, field) as a JSON file"""
+    with open(file_path, 'w') as outfile:
+        json.dump(summary(), outfile, indent=4)
@@ -0,0 +1,113 @@
+"""
+run journal
+This module is part of ANITA
+
+This module contains the journal of a run, used to resume the import and scraping after a crash or interruption.
+The journal is an append-only file with one JSON line per processed file:
+    {'stage': 'import' or 'scrape', 'path': path of the file, 'status': what happened, 'target': path in the sorted
+    store (import only), 'record': the scraped page in json format (if scraped)}
+Every line is written as soon as the file is processed. When a run is resumed with the same journal, the files of which
+the stage is already in the journal are skipped and their scraped pages are taken from the journal.
+"""
+
+import os
+import json
+import time
+import datetime
+
+
+def convert_date(o):
+    """JSON cannot store datetime objects, thus unix time is used (the same as in the exported JSON files)"""
+    if isinstance(o, datetime.date):
+        return time.mktime(o.timetuple())
+
+
+class RunJournal:
+    """The processed files of a run, read from the journal file when it exists and extended while running
+    Only the status and target of the files are kept in memory, the scraped pages of the files that are processed before
+    are read from the journal file when they are needed (see record)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}  # {(stage, path) : (status, target)}
+
+        # read the files that are processed before, a line that is not complete (crash while writing) is ignored
+        if os.path.isfile(path):
+            with open(path) as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[(entry['stage'], entry['path'])] = (entry['status'], entry['target'])
+        self.resumed = len(self.entries)  # number of files processed before this run
+        self.resumed_size = os.path.getsize(path) if os.path.isfile(path) else 0  # the lines written before this run
+
+        # the readers of the scraped pages per stage {stage : (lines, pages that are read but not asked for yet)}
+        self.readers = {}
+
+        self.journal_file = open(path, 'a')
+
+    def done(self, stage, path):
+        """Returns True if the stage of the file is already in the journal"""
+        return (stage, path) in self.entries
+
+    def get(self, stage, path):
+        """Returns the entry of the stage of the file as dict {'status', 'target'}, or None if it is not in the
+        journal. The scraped page is not part of the entry, see record"""
+        if (stage, path) not in self.entries:
+            return None
+        status, target = self.entries[(stage, path)]
+        return {'status': status, 'target': target}
+
+    def paths(self, stage):
+        """Returns the paths of the files of the stage in the journal, in the order they are processed"""
+        return [path for (entry_stage, path) in self.entries if entry_stage == stage]
+
+    def read_records(self, stage):
+        """Yields (path, record) of the files of the stage that are processed before this run, in the order of the
+        journal file. The file is read one line at a time"""
+        with open(self.path, 'rb') as journal_file:
+            while journal_file.tell() < self.resumed_size:
+                line = journal_file.readline()
+                if not line:
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry['stage'] == stage:
+                    yield entry['path'], entry['record']
+
+    def record(self, stage, path):
+        """Returns the scraped page of the stage of a file that is processed before this run, None if there is none
+        The journal file is read in one pass: when the pages are asked for in the order they are processed (the same
+        order of the files as the interrupted run), only one page is in memory at a time"""
+        if stage not in self.readers:
+            self.readers[stage] = (self.read_records(stage), {})
+        lines, pending = self.readers[stage]
+        while path not in pending:
+            try:
+                entry_path, entry_record = next(lines)
+            except StopIteration:
+                return None
+            pending[entry_path] = entry_record
+        return pending.pop(path)
+
+    def add(self, stage, path, status, target=None, record=None):
+        """Appends the processed file to the journal, the line is written to the file directly"""
+        entry = {'stage': stage, 'path': path, 'status': status, 'target': target, 'record': record}
+        line = json.dumps(entry, default=convert_date)
+        self.journal_file.write(line + '\n')
+        self.journal_file.flush()
+        self.entries[(stage, path)] = (status, target)
+
+    def close(self):
+        for lines, pending in self.readers.values():
+            lines.close()
+        self.journal_file.close()
+
+    def remove(self):
+        """Closes and removes the journal, used when the run is completed"""
+        self.close()
+        os.remove(self.path)
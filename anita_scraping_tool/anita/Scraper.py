@@ -6,14 +6,59 @@ This module contains functions for the processing of the main scraping process.
 Scraping of individual websites is included in the scrapers folder, every website has it's own specific scraper module
 """
 
+import io
 import os
 from bs4 import BeautifulSoup
 import time
 import datetime
 from .MarketScraper import MarketIdentifier
+from .PriceNormalizer import normalize_prices
+from . import Profiler
+from . import ParseCache
 import importlib
+import importlib.util
+import multiprocessing
 import pycountry
-import requests
+
+# Parser used by BeautifulSoup to create the soups: 'html.parser', 'lxml' (fast) or 'html5lib' (lenient)
+parser_backend = "html.parser"
+
+# Parser used when a page cannot be parsed or identified with the parser_backend, None to disable
+fallback_parser = None
+
+# Pages of which no fingerprint of a market and page type is found in the raw html, they are identified by parsing the
+# whole page: {'pages': number of pages, 'data_pages': {market : number of vendor and product pages}}
+# Counted in the process that identifies the pages, see report_unmatched_pages
+unmatched_pages = {'pages': 0, 'data_pages': {}}
+
+
+def set_parser(parser, fallback=None):
+    """Sets the parser backend and the fallback parser used for all soups
+    parser and fallback can be 'html.parser', 'lxml' or 'html5lib', the packages lxml and html5lib need to be installed
+    when used"""
+    global parser_backend, fallback_parser
+    for name in [parser, fallback]:
+        if name is not None and name not in ["html.parser", "lxml", "html5lib"]:
+            raise ValueError(f'Unknown parser: {name}')
+        if name is not None and name != "html.parser" and importlib.util.find_spec(name) is None:
+            raise ValueError(f'The parser {name} is not installed')
+    parser_backend = parser
+    fallback_parser = fallback
+
+
+def scan_folder(folder_path):
+    """Yields the os.DirEntry of all .htm and .html files in the folder and its subfolders
+    The '_files' folders of the pages only contain images, css and scripts, they are not scanned"""
+    with os.scandir(folder_path) as entries:
+        folders = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.endswith('_files'):
+                    folders.append(entry.path)
+            elif entry.name.endswith((".html", ".htm")):
+                yield entry
+    for folder in folders:
+        yield from scan_folder(folder)
 
 
 def open_folder(folder_path):
@@ -22,16 +67,39 @@ def open_folder(folder_path):
     :rtype: list
     """
     assert os.path.isdir(folder_path)
-    return [os.path.join(root, name)
-            for root, dirs, files in os.walk(folder_path)
-            for name in files
-            if name.endswith((".html", ".htm"))]
+    return [entry.path for entry in scan_folder(folder_path)]
 
 
 def get_soup(file_path):
     """Creates the soup"""
     assert os.path.isfile(file_path)
-    return BeautifulSoup(open(file_path), "html.parser")
+    return BeautifulSoup(open(file_path), parser_backend)
+
+
+def read_bytes(file_path):
+    """Returns the raw content of the file in bytes"""
+    assert os.path.isfile(file_path)
+    with open(file_path, 'rb') as html_file:
+        return html_file.read()
+
+
+def get_soup_bytes(html_bytes, parse_only=None, parser=None):
+    """Creates the soup from the raw html, the bytes are decoded the same way as get_soup reads a file
+    parse_only is a SoupStrainer, when given only the matching parts of the page are in the soup. It is only used with
+    lxml, html.parser is slower with a SoupStrainer than without and html5lib always parses the whole page
+    parser is the parser to use, the parser_backend when None. If the parser fails the fallback_parser is used"""
+    if parser is None:
+        parser = parser_backend
+    if parser != "lxml":
+        parse_only = None
+    try:
+        return BeautifulSoup(io.TextIOWrapper(io.BytesIO(html_bytes)), parser, parse_only=parse_only)
+    except UnicodeDecodeError:
+        raise
+    except:
+        if fallback_parser is None or fallback_parser == parser:
+            raise
+        return BeautifulSoup(io.TextIOWrapper(io.BytesIO(html_bytes)), fallback_parser)
 
 
 def determine_market(soup_file):
@@ -42,6 +110,113 @@ def determine_market(soup_file):
     except:  # RONALD CHECK!
         return False
 
+def find_fingerprint(fingerprint, html_bytes):
+    """Checks whether the fingerprint is in the raw html, a fingerprint is a part of the html (bytes) or a compiled
+    regular expression (in bytes)"""
+    if isinstance(fingerprint, bytes):
+        return fingerprint in html_bytes
+    return fingerprint.search(html_bytes) is not None
+
+
+def fingerprint_page(html_bytes, market_modules):
+    """Determines the market and the possible page types from the raw html, before the page is parsed
+    Returns a tuple (market, page_types):
+        market is the name of the market when the fingerprints of one market are found, None if no market or more
+        than one market is found and the soup is needed to identify the market (see determine_market)
+        page_types is a list of page types the page can have according to the fingerprints, empty if no fingerprint of
+        a market and a page type is found"""
+    candidates = {}
+    for market in MarketIdentifier.identify_market_bytes(html_bytes):
+        if market not in market_modules:
+            continue
+        # markets without fingerprint can be any page type
+        page_fingerprint = getattr(market_modules[market], 'page_fingerprint', None)
+        if page_fingerprint is None:
+            candidates[market] = ['product', 'vendor']
+            continue
+        page_types = [page_type for page_type, fingerprints in page_fingerprint.items()
+                      if any(find_fingerprint(fingerprint, html_bytes) for fingerprint in fingerprints)]
+        if page_types:
+            candidates[market] = page_types
+
+    # One market, the market is confirmed with its signature when the page is parsed
+    if len(candidates) == 1:
+        market = list(candidates.keys())[0]
+        return market, candidates[market]
+
+    # No market or multiple markets found, use the soup based identifier
+    page_types = sorted(set(page_type for market in candidates for page_type in candidates[market]))
+    return None, page_types
+
+
+def count_unmatched_page(market, page_type):
+    """Counts a page without fingerprints that is identified with the soup, see unmatched_pages"""
+    unmatched_pages['pages'] += 1
+    if page_type in ['product', 'vendor']:
+        unmatched_pages['data_pages'][market] = unmatched_pages['data_pages'].get(market, 0) + 1
+
+
+def report_unmatched_pages():
+    """Prints the number of pages without fingerprints that are identified with the soup and starts counting again
+    Vendor and product pages among them mean that the fingerprints of their market miss pages"""
+    if unmatched_pages['pages'] > 0:
+        print(f"{unmatched_pages['pages']} pages are not recognised by the fingerprints of the markets and are "
+              f"identified by parsing them")
+        for market, pages in unmatched_pages['data_pages'].items():
+            print(f'{pages} of them are vendor or product pages of {market}, check the fingerprints of the market')
+    unmatched_pages['pages'] = 0
+    unmatched_pages['data_pages'] = {}
+
+
+def identify_page(html_bytes, market_modules):
+    """Determines the market and page type of the raw html
+    When the fingerprints of one market are found, only the parts of the page that the market module needs are parsed
+    and the market is confirmed with its signature. Otherwise the whole page is parsed and the market is identified
+    with the soup, as the fingerprints can miss pages
+    Returns a tuple (soup, market, page_type), the market is False if the page does not belong to a market"""
+    market, page_types = fingerprint_page(html_bytes, market_modules)
+
+    # If the market is known, only the parts of the page that the market module needs are parsed (lxml only)
+    parse_only = None
+    if market is not None:
+        if parser_backend == "lxml":
+            parse_only = getattr(market_modules[market], 'parse_only', None)
+        soup = get_soup_bytes(html_bytes, parse_only)
+        if not MarketIdentifier.confirm_market(soup, market):
+            market = None
+            parse_only = None
+    if market is None:
+        soup = get_soup_bytes(html_bytes)
+
+    # fall back on the soup based identifier if the market is not found or ambiguous
+    if market is None:
+        market = determine_market(soup)
+        if market is False and fallback_parser is not None:
+            soup = get_soup_bytes(html_bytes, parser=fallback_parser)
+            market = determine_market(soup)
+        if market is False:
+            if not page_types:
+                count_unmatched_page(market, None)
+            return soup, False, None
+
+    page_type = market_modules[market].pagetype(soup)
+
+    # The page can contain data, but the soup does not. Parse the page again with the fallback parser if there is one,
+    # as the page can be broken. Without fallback parser the page is only parsed again (in full) when the market module
+    # says its pagetype needs parts of the page that parse_only leaves out
+    if page_type not in ['product', 'vendor']:
+        if fallback_parser is not None:
+            soup = get_soup_bytes(html_bytes, parser=fallback_parser)
+            page_type = market_modules[market].pagetype(soup)
+        elif parse_only is not None and getattr(market_modules[market], 'pagetype_full_page', False):
+            soup = get_soup_bytes(html_bytes)
+            page_type = market_modules[market].pagetype(soup)
+
+    if not page_types:
+        count_unmatched_page(market, page_type)
+    return soup, market, page_type
+
+
 def import_market_modules():
     """Initializes a dict with all modules that contain the scrapers for different markets
     returns a dict in this form {market_name : 'module'}"""
@@ -61,45 +236,123 @@ def import_market_modules():
     return parser_dict
 
 
-def extract_data(all_files_list, market_modules):
-    """All data is to be extracted from the given list of files_paths in all_files_list
-    It uses classes:
-        Web_page  for the main information about the html file
-        Product for the data about the products
-        Vendor for the data about the vendors
-    The function returns a list of json files per page, in the format:
-        [{'web_page': web_page_information, 'page_data':page_specific_data}, etc]"""
+def get_file_date(path):
+    """Returns the date in the name of the file (yyyy_mm_dd_filename) in unix time"""
+    return time.mktime(
+        datetime.datetime.strptime('/'.join(path.split('/')[-1].split('_')[0:3]), '%Y/%m/%d').timetuple())
 
-    # Initialize the list of data
-    data = []
 
-    # loop through all the paths in the all_files_list
-    for path in all_files_list:
-        # Retrieve main information about the individual pages
-        soup = get_soup(path)
-        market_name = determine_market(soup)
-        if market_name is False:
-            continue
-        page_type = market_modules[market_name].pagetype(soup)
-        date = time.mktime(
-            datetime.datetime.strptime('/'.join(path.split('/')[-1].split('_')[0:3]), '%Y/%m/%d').timetuple())
-
-        # Create overview object of the main information about the page
-        web_page_information = WebPage(path, market_name, page_type, date, soup)
-
-        # Page data for vendor or product pages
-        if web_page_information.page_type == 'product':
-            page_specific_data = Product(soup, market_modules[web_page_information.market], date)
-        elif web_page_information.page_type == 'vendor':
-            page_specific_data = Vendor(web_page_information.soup, market_modules[web_page_information.market], date)
-        else:
-            page_specific_data = None
+def create_page(path, soup, market_name, page_type, market_modules):
+    """Creates the page data for a soup of which the market and page type are already determined
+    Returns a dict in the format {'web_page': web_page_information, 'page_data':page_specific_data}"""
+    date = get_file_date(path)
+
+    # Create overview object of the main information about the page
+    web_page_information = WebPage(path, market_name, page_type, date, soup)
+
+    # The market module, its field functions are timed if the profiler is enabled
+    scraper = Profiler.profiled(market_modules[web_page_information.market], web_page_information.market)
+
+    # Page data for vendor or product pages
+    if web_page_information.page_type == 'product':
+        page_specific_data = Product(soup, scraper, date)
+    elif web_page_information.page_type == 'vendor':
+        page_specific_data = Vendor(web_page_information.soup, scraper, date)
+    else:
+        page_specific_data = None
+
+    return {'web_page': web_page_information, 'page_data': page_specific_data}
 
-        # add all info to a list
-        data.append({'web_page': web_page_information, 'page_data': page_specific_data})
-    return data
 
+def extract_page(path, market_modules, html_bytes=None):
+    """Extracts the data of a single file, html_bytes is the content of the file if it is already read
+    Returns a dict in the format {'web_page': web_page_information, 'page_data':page_specific_data}
+    or None if the market of the file could not be determined"""
+    if html_bytes is None:
+        html_bytes = read_bytes(path)
+
+    # Retrieve main information about the individual page
+    soup, market_name, page_type = identify_page(html_bytes, market_modules)
+    if market_name is False:
+        return None
+
+    return create_page(path, soup, market_name, page_type, market_modules)
+
+
+def page_to_json(page):
+    """Converts the output of extract_page into the json format
+    The soup, the file name and the scraper module are removed, only plain data is kept"""
+    if page['web_page'] is not None:
+        web_page = page['web_page'].__dict__
+        del web_page['soup']
+        del web_page['file_name']
+    else:
+        web_page = None
+
+    if page['page_data'] is not None:
+        page_data = page['page_data'].__dict__
+        del page_data['scraper']
+    else:
+        page_data = None
+
+    return {
+        'web_page': web_page,
+        'page_data': page_data}
+
+
+# market modules of a worker process, set by init_worker
+worker_market_modules = None
+
+
+def init_worker(parser, fallback, profile=False, cache_path=None):
+    """Initializer of the worker processes, every worker imports the market modules once and uses the same parsers,
+    profiler setting and parse cache as the main process"""
+    global worker_market_modules
+    worker_market_modules = import_market_modules()
+    set_parser(parser, fallback)
+    Profiler.enable(profile)
+    ParseCache.configure(cache_path)
+
+
+def extract_record_with(path, market_modules):
+    """Returns the page of the path in json format, or None if the market of the file could not be determined
+    The soup is not needed anymore, the memory of the tree is freed before returning
+    When the parse cache is used, the page is taken from the cache if it is scraped before by the same scraper"""
+    html_bytes = read_bytes(path)
+    if ParseCache.cache_path is not None:
+        key = ParseCache.page_key(html_bytes, get_file_date(path), (parser_backend, fallback_parser))
+        record = ParseCache.load(key, market_modules)
+        if record is not None:
+            return record
+
+    page = extract_page(path, market_modules, html_bytes)
+    if page is None:
+        return None
+    page['web_page'].soup.decompose()
+    record = page_to_json(page)
 
+    if ParseCache.cache_path is not None:
+        ParseCache.store(key, record)
+    return record
+
+
+def extract_record(path):
+    """Worker function for iter_records
+    Returns the page of the path in json format, only plain dicts are send back to the main process
+    If the profiler is enabled, the calls profiled by the worker are send back with the page: (page, calls)"""
+    record = extract_record_with(path, worker_market_modules)
+    if Profiler.enabled:
+        return record, Profiler.take()
+    return record
+
+
+def receive_records(records):
+    """Yields the pages send back by extract_record, the profiled calls are added to the profiler of this process"""
+    for record in records:
+        if Profiler.enabled:
+            record, calls = record
+            Profiler.merge(calls)
+        yield record
 
 
 class WebPage:
@@ -123,7 +376,7 @@ class Product:
         self.ships_from = self.get_ships_from(soup)
         self.ships_to = self.get_ships_to(soup)
         self.price = self.get_price(soup)
-        self.price_eur = Product.get_price_eur(self.price, file_date)
+        self.price_eur = None  # converted for all pages at once after the scraping, see PriceNormalizer
         self.info = self.get_info(soup)
         self.macro_category  = self.get_macro_category(soup)
         self.micro_category  = self.get_micro_category(soup)
@@ -193,73 +446,6 @@ class Product:
         except:
             return None
 
-    @staticmethod
-    def get_price_eur(price, file_date):
-        """This function handles to conversion into euro's, this happens in three different ways:
-        1. The price is already in euros, keep it that way
-        2. The price is in dollars, will be converted to euro's via API (function: convert_usd_to_eur)
-        3. The price is in bitcoin, bitcoin will be converted to dollars and dollars to euro's.
-        The conversion rates of the given dates of the files are used for the conversion"""
-
-        # Conversion for the pages that contain only one price
-        if type(price) == str or type(price) == float or type(price) == int:
-            if ('usd' in price.lower()) or ('$' in price.lower()):
-                price_dollar = float(''.join(c for c in price if c.isdigit() or c == '.'))
-                price_euro = float(Product.convert_usd_to_eur(price_dollar, file_date))
-                if price_euro is not None:
-                    price_euro = round(price_euro, 2)
-                return price_euro
-            if ('eur' in price.lower()) or ('€' in price):
-                price_euro = float(''.join(c for c in price if c.isdigit() or c == '.'))
-                if price_euro is not None:
-                    price_euro = round(price_euro, 2)
-                return price_euro
-            if '฿' in price:
-                if price is None:
-                    return None
-                price_bitcoin = float(''.join(c for c in price if c.isdigit() or c == '.'))
-                price_dollar = Product.convert_btc_to_usd(price_bitcoin, file_date)
-                if price_dollar is None:
-                    return None
-                price_dollar = round(float(price_dollar), 2)
-                price_euro = Product.convert_usd_to_eur(price_dollar, file_date)
-                if price_euro is None:
-                    return None
-                return round(float(price_euro), 2)
-
-        # Conversion for the pages that contain multiple prices and are given in a dict
-        if type(price) == dict:
-            new_price_dict = {}
-            for item in price:
-                if ('usd' in price[item].lower()) or ('$' in price[item].lower()):
-                    price_dollar = float(''.join(c for c in price[item] if c.isdigit() or c == '.'))
-                    price_eur = Product.convert_usd_to_eur(price_dollar, file_date)
-                    if price_eur is None:
-                        new_price_dict[item] = None
-                    else:
-                        new_price_dict[item] = round(float(price_eur), 2)
-                elif 'eur' in price[item].lower():
-                    price_eur = float(''.join(c for c in price[item] if c.isdigit() or c == '.'))
-                    if price_eur is  None:
-                        new_price_dict[item] = None
-                    else:
-                        new_price_dict[item] = round(float(price_eur), 2)
-                elif '฿' in price:
-                    price_bitcoin = float(''.join(c for c in price[item] if c.isdigit() or c == '.'))
-                    price_dollar = Product.convert_btc_to_usd(price_bitcoin, file_date)
-                    if price_dollar is None:
-                        new_price_dict[item] = None
-                    else:
-                        price_dollar = round(price_dollar, 2)
-                        price_eur = Product.convert_usd_to_eur(price_dollar, file_date)
-                        if price_eur is None:
-                            new_price_dict[item] = None
-                        else:
-                            new_price_dict[item] = round(float(price_eur), 2)
-                else:
-                    new_price_dict[item] = None
-            return new_price_dict
-
     def get_info(self, soup):
         """Returns the info as str"""
         try:
@@ -325,78 +511,6 @@ class Product:
         except:
             return 'Country_naming_error'
 
-    @staticmethod
-    def convert_usd_to_eur(price, date):
-        """Converts the price of dollar to eur on a specific date using an API"""
-        date = datetime.datetime.fromtimestamp(date).date()  # convert unix to datetime
-        if type(date) == datetime.date and (type(price) == float or type(price) == int):
-            # two dates needed to find the exchange (USD/EUR) rate in that period
-            date_2 = date - datetime.timedelta(days=-1)
-            date_1 = date.strftime('%Y-%m-%d')
-            date_2 = date_2.strftime('%Y-%m-%d')
-
-            # Use the exchangeratesapi to find the right exchange rate
-            response = requests.get(
-                'https://api.exchangeratesapi.io/history?start_at=' + date_1 + '&end_at=' + date_2 + '&symbols=USD')
-            try:
-                if response.status_code != 200:
-                    print('error: Request went wrong, exchangerates api status code: ' + str(response.status_code))
-                    return None
-                if response.status_code == 200:
-                    if date_1 in response.json()['rates']:
-                        conversion_rate = response.json()['rates'][date_1]['USD']
-                    else:
-                        conversion_rate = response.json()['rates'][date_2]['USD']
-
-                    return price / conversion_rate
-            except:
-                try:
-                    print('something went wrong with the exchangerates API')
-                    print(response.status_code, response.json())
-                    print(f'requested: {date_1} and {date_2}')
-                    return None
-                except:
-                    print('something went wrong with the exchangerates API')
-                    return None
-        else:
-            if type(date) != datetime.date:
-                print('error: Wrong format of date, no datetime object')
-            if type(price) != float:
-                print('error: Wrong format of price, no float')
-
-        return None
-
-    @staticmethod
-    def convert_btc_to_usd(price, date):
-        """Converts the price of dollar to eur on a specific date using an API"""
-        date = datetime.datetime.fromtimestamp(date).date()  # convert unix to datetime
-
-        if type(date) == datetime.date and (type(price) == float or type(price) == int):
-            # two dates needed to find the exchange (USD/EUR) rate in that period
-            date = date.strftime('%Y-%m-%d')
-
-            # Use the coindesk to find the right exchange rate
-            response = requests.get(
-                'https://api.coindesk.com/v1/bpi/historical/close.json?start=' + date + '&end=' + date)
-            try:
-                if response.status_code != 200:
-                    print('error: Request went wrong, coindesk api status code: ' + str(response.status_code))
-                    return None
-                if response.status_code == 200:
-                    conversion_rate = response.json()['bpi'][date]
-                    return price * conversion_rate
-            except:
-                print('something went wrong with the coindesk API')
-                return None
-
-        else:
-            if type(date) != datetime.date:
-                print('error: Wrong format of date, no datetime object')
-            if type(price) != float:
-                print('error: Wrong format of price, no float')
-
-        return None
-
 
 class Vendor:
     """Scrape the soup for product"""
@@ -591,13 +705,84 @@ class Vendor:
             return 'exact date'
 
 
-def json(file_input):
+def journal_records(journal, all_files_list, records):
+    """Yields the records of the files and adds every file with its record to the journal of the run"""
+    for path, record in zip(all_files_list, records):
+        journal.add('scrape', path, 'scraped' if record is not None else 'unknown market', record=record)
+        yield record
+
+
+def resume_records(journal, all_files_list, resumed, records):
+    """Yields the records of all files in the order of all_files_list, the same order as a run that is not
+    interrupted. The record of a file that is scraped before (resumed) is read from the journal, the records of the
+    other files are taken from records"""
+    for path, path_resumed in zip(all_files_list, resumed):
+        if path_resumed:
+            yield journal.record('scrape', path)
+        else:
+            yield next(records)
+
+
+def iter_records(all_files_list, processes=1, chunk_size=16, batch_size=1000, journal=None):
+    """Streaming version of json, yields the pages of the files one at a time in json format
+    The soup of a page is decomposed as soon as the page is extracted, thus only one parsed page per process is kept in
+    memory, regardless of the number of files
+    processes is the number of worker processes used for the scraping, 1 means no parallel processing
+    chunk_size is the number of files given to a worker at once, only used when processes is not 1
+    batch_size is the number of pages of which the prices are converted into euro's at once
+    journal is the RunJournal of the run, None to not use a journal. The files that are scraped before are not scraped
+    again, their pages are taken from the journal in the order of the files"""
+    new_files = all_files_list
+    if journal is not None:
+        resumed = [journal.done('scrape', path) for path in all_files_list]
+        new_files = [path for path, path_resumed in zip(all_files_list, resumed) if not path_resumed]
+
+    if processes != 1:
+        settings = (parser_backend, fallback_parser, Profiler.enabled, ParseCache.cache_path)
+        pool = multiprocessing.Pool(processes, initializer=init_worker, initargs=settings)
+        records = receive_records(pool.imap(extract_record, new_files, chunksize=chunk_size))
+    else:
+        pool = None
+        market_modules = import_market_modules()
+        records = (extract_record_with(path, market_modules) for path in new_files)
+
+    if journal is not None:
+        records = resume_records(journal, all_files_list, resumed, journal_records(journal, new_files, records))
+
+    try:
+        batch = []
+        for record in records:
+            if record is None:
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from normalize_prices(batch)
+                batch = []
+        yield from normalize_prices(batch)
+        # the pages identified by the worker processes are counted in the workers
+        if pool is None:
+            report_unmatched_pages()
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def extract_data(all_files_list, market_modules=None, processes=1, chunk_size=16):
+    """All data is to be extracted from the given list of files_paths in all_files_list, see iter_records
+    market_modules is not used anymore, the market modules are imported by iter_records (once per worker process)
+    processes is the number of worker processes used for the scraping, 1 means no parallel processing
+    The function returns a list of pages in json format with the prices converted into euro's, in the format:
+        [{'web_page': web_page_information, 'page_data':page_specific_data}, etc]"""
+    return list(iter_records(all_files_list, processes, chunk_size))
+
+
+def json(file_input, processes=1, chunk_size=16):
     """Export a json file for the input
     Can have two types of input:
     A string of the folder you want a json file of
-    A list of paths to the files you want a json file of"""
-    market_modules = import_market_modules()
-
+    A list of paths to the files you want a json file of
+    processes is the number of worker processes used for the scraping, 1 means no parallel processing
+    chunk_size is the number of files given to a worker at once, only used when processes is not 1"""
     if type(file_input) == str:
         # find all html files in the subsequent folder
         file_list = open_folder(file_input)
@@ -606,25 +791,4 @@ def json(file_input):
     else:
         file_list = None
 
-    data = extract_data(file_list, market_modules)
-
-    json_list = []
-    for page in data:
-        if page['web_page'] is not None:
-            web_page = page['web_page'].__dict__
-            del web_page['soup']
-            del web_page['file_name']
-        else:
-            web_page = None
-
-        if page['page_data'] is not None:
-            page_data = page['page_data'].__dict__
-            del page_data['scraper']
-        else:
-            page_data = None
-
-        json_format_data = {
-            'web_page': web_page,
-            'page_data': page_data}
-        json_list.append(json_format_data)
-    return json_list
\ No newline at end of file
+    return extract_data(file_list, processes=processes, chunk_size=chunk_size)
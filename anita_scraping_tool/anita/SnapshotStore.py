@@ -0,0 +1,160 @@
+"""
+snapshot store
+This module is part of ANITA
+
+This module contains the SQLite storage of the merged data, an alternative for the JSON files of the export folder.
+The JSON export is a tree of files (json_export_folder/market/date/date_market_page_type.txt) with one JSON object per
+file, and the Item_id handler files that are rewritten as a whole. In the store the same data is kept in tables:
+    snapshots: every item of every export (market, date, page_type, item_id) with its data as JSON
+    products: the vendor, name and price of every product of every export
+    vendors: the names of the vendors of every export
+    feedback: every review of every item of every export
+    product_ids: the product-ID registry, the product_id of every (vendor, name) in the order the IDs are given out
+    vendor_ids: the names of all vendors of a market
+The store is used by store_json (see Merge) when it is given, only the items that are added or changed are written.
+Readers can query the rows they need instead of loading whole export files.
+"""
+
+import json
+import sqlite3
+import datetime
+import time
+
+# Name of the store file in the export folder
+store_name = 'anita.sqlite'
+
+
+def convert_date(o):
+    """JSON cannot store datetime objects, thus unix time is used (the same as in the exported JSON files)"""
+    if isinstance(o, datetime.date):
+        return time.mktime(o.timetuple())
+
+
+class SnapshotStore:
+    """The exports of the merged data in a SQLite file, with the product-ID registry of every market"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS snapshots (market TEXT NOT NULL, date TEXT NOT NULL, page_type TEXT NOT NULL,
+                item_id TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (market, page_type, date, item_id));
+            CREATE INDEX IF NOT EXISTS snapshots_market_date ON snapshots (market, date);
+
+            CREATE TABLE IF NOT EXISTS products (market TEXT NOT NULL, date TEXT NOT NULL, product_id TEXT NOT NULL,
+                vendor TEXT, name TEXT, price_eur REAL, PRIMARY KEY (market, date, product_id));
+            CREATE INDEX IF NOT EXISTS products_market_vendor_name ON products (market, vendor, name);
+            CREATE INDEX IF NOT EXISTS products_market_date ON products (market, date);
+
+            CREATE TABLE IF NOT EXISTS vendors (market TEXT NOT NULL, date TEXT NOT NULL, name TEXT NOT NULL,
+                PRIMARY KEY (market, date, name));
+            CREATE INDEX IF NOT EXISTS vendors_market_date ON vendors (market, date);
+
+            CREATE TABLE IF NOT EXISTS feedback (market TEXT NOT NULL, date TEXT NOT NULL, page_type TEXT NOT NULL,
+                item_id TEXT NOT NULL, message TEXT, feedback_date REAL, data TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS feedback_item ON feedback (market, page_type, date, item_id);
+            CREATE INDEX IF NOT EXISTS feedback_market_date ON feedback (market, date);
+
+            CREATE TABLE IF NOT EXISTS product_ids (market TEXT NOT NULL, number INTEGER NOT NULL,
+                product_id TEXT NOT NULL, vendor TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (market, number));
+            CREATE INDEX IF NOT EXISTS product_ids_market_vendor_name ON product_ids (market, vendor, name);
+
+            CREATE TABLE IF NOT EXISTS vendor_ids (market TEXT NOT NULL, name TEXT NOT NULL,
+                PRIMARY KEY (market, name));
+        ''')
+        self.connection.commit()
+
+    def export_dates(self, market, page_type):
+        """Returns the sorted dates (yyyy_mm_dd) of which an export of the market and page type exists"""
+        return [row[0] for row in self.connection.execute(
+            'SELECT DISTINCT date FROM snapshots WHERE market = ? AND page_type = ? ORDER BY date',
+            (market, page_type)).fetchall()]
+
+    def load_snapshot(self, market, date, page_type):
+        """Returns the export of the market, date and page type as JSON {item_id : data}, None if there is no export"""
+        rows = self.connection.execute('SELECT item_id, data FROM snapshots WHERE market = ? AND page_type = ? AND '
+                                       'date = ? ORDER BY rowid', (market, page_type, date)).fetchall()
+        if len(rows) == 0:
+            return None
+        return {item_id: json.loads(data) for item_id, data in rows}
+
+    def store_snapshot(self, market, date, page_type, items):
+        """Adds the items {item_id : data} to the export of the market, date and page type in one transaction
+        An item that is already in the export is replaced, together with its feedback"""
+        snapshot_rows, product_rows, vendor_rows, feedback_rows = [], [], [], []
+        for item_id, page_data in items.items():
+            snapshot_rows.append((market, date, page_type, item_id, json.dumps(page_data, default=convert_date)))
+            data = page_data['page_data']
+            if page_type == 'product':
+                product_rows.append((market, date, item_id, data['vendor'], data['name'], data.get('price_eur')))
+            else:
+                vendor_rows.append((market, date, item_id))
+            for review in data['feedback'] or []:
+                feedback_date = review.get('date')
+                if isinstance(feedback_date, datetime.date):
+                    feedback_date = convert_date(feedback_date)
+                feedback_rows.append((market, date, page_type, item_id, review.get('message'), feedback_date,
+                                      json.dumps(review, default=convert_date)))
+
+        with self.connection:
+            self.connection.executemany('INSERT INTO snapshots (market, date, page_type, item_id, data) '
+                                        'VALUES (?, ?, ?, ?, ?) ON CONFLICT (market, page_type, date, item_id) '
+                                        'DO UPDATE SET data = excluded.data', snapshot_rows)
+            self.connection.executemany('INSERT OR REPLACE INTO products (market, date, product_id, vendor, name, '
+                                        'price_eur) VALUES (?, ?, ?, ?, ?, ?)', product_rows)
+            self.connection.executemany('INSERT OR IGNORE INTO vendors (market, date, name) VALUES (?, ?, ?)',
+                                        vendor_rows)
+            self.connection.executemany('DELETE FROM feedback WHERE market = ? AND date = ? AND page_type = ? AND '
+                                        'item_id = ?', [(market, date, page_type, item_id) for item_id in items])
+            self.connection.executemany('INSERT INTO feedback (market, date, page_type, item_id, message, '
+                                        'feedback_date, data) VALUES (?, ?, ?, ?, ?, ?, ?)', feedback_rows)
+
+    def load_item_id_lists(self, market):
+        """Returns the product-ID registry and the vendors of the market, in the same format as the Item_id handler
+        files: {'item_idx', 'idx_finder', 'vendor_product_list', 'vendor_list', 'new_products'} (see Merge)"""
+        item_idx = 0
+        idx_finder = {}
+        vendor_product_list = {}
+        for product_id, vendor, name in self.connection.execute(
+                'SELECT product_id, vendor, name FROM product_ids WHERE market = ? ORDER BY number', (market,)):
+            item_idx += 1
+            idx_finder[vendor + '_' + name] = product_id
+            vendor_product_list.setdefault(vendor, []).append(product_id)
+        vendor_list = [row[0] for row in self.connection.execute('SELECT name FROM vendor_ids WHERE market = ?',
+                                                                 (market,)).fetchall()]
+        return {'item_idx': item_idx, 'idx_finder': idx_finder, 'vendor_product_list': vendor_product_list,
+                'vendor_list': vendor_list, 'new_products': []}
+
+    def store_item_id_lists(self, market, id_lists):
+        """Adds the products that got an ID (new_products) and the vendors of the market to the registry, in one
+        transaction"""
+        number = self.connection.execute('SELECT COUNT(*) FROM product_ids WHERE market = ?', (market,)).fetchone()[0]
+        product_rows = []
+        for vendor, name, product_id in id_lists['new_products']:
+            number += 1
+            product_rows.append((market, number, product_id, vendor, name))
+        with self.connection:
+            self.connection.executemany('INSERT INTO product_ids (market, number, product_id, vendor, name) '
+                                        'VALUES (?, ?, ?, ?, ?)', product_rows)
+            self.connection.executemany('INSERT OR IGNORE INTO vendor_ids (market, name) VALUES (?, ?)',
+                                        [(market, name) for name in set(id_lists['vendor_list'])])
+        id_lists['new_products'] = []
+
+    def items(self, market=None, date=None, page_type=None):
+        """Yields the items of the exports as (market, date, page_type, item_id, data), optionally only of the market,
+        the date and/or the page type"""
+        query = 'SELECT market, date, page_type, item_id, data FROM snapshots'
+        conditions, parameters = [], []
+        for column, value in [('market', market), ('date', date), ('page_type', page_type)]:
+            if value is not None:
+                conditions.append(column + ' = ?')
+                parameters.append(value)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        for market, date, page_type, item_id, data in self.connection.execute(query + ' ORDER BY market, date',
+                                                                              parameters):
+            yield market, date, page_type, item_id, json.loads(data)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,103 @@
+"""
+benchmark_parsers
+This script is part of ANITA
+
+Compares the parser backends of BeautifulSoup on sample pages of the markets.
+For every market the time to parse a page and to extract the fields is measured per backend, and the extracted fields
+are compared with the fields extracted by 'html.parser', with and without the parse_only of the market module.
+"""
+
+import os
+import sys
+import time
+import importlib.util
+import anita.Scraper as scraper
+
+# The fields in the order they are extracted by the Product and Vendor classes of the scraper
+FIELDS = {
+    'product': ['p_product_name', 'p_vendor', 'p_ships_from', 'p_ships_to', 'p_price', 'p_info', 'p_macro_category',
+                'p_micro_category', 'p_feedback'],
+    'vendor': ['v_vendor_name', 'v_score', 'v_registration', 'v_last_login', 'v_sales', 'v_info', 'v_pgp',
+               'v_feedback'],
+}
+
+
+def extract_fields(soup, module, page_type):
+    """Returns a dict with all the fields of the page type extracted from the soup {field : value}"""
+    fields = {}
+    for field in FIELDS[page_type]:
+        try:
+            fields[field] = repr(getattr(module, field)(soup))
+        except Exception as error:
+            fields[field] = 'error: ' + type(error).__name__
+    return fields
+
+
+def benchmark(file_paths, backends):
+    """Parses and extracts every file with every backend
+    Returns a dict {market : {backend : {'pages', 'parse', 'extract', 'different'}}}"""
+    market_modules = scraper.import_market_modules()
+    results = {}
+
+    for path in file_paths:
+        html_bytes = scraper.read_bytes(path)
+
+        # use the reference parser to find the market, page type and fields
+        soup, market, page_type = scraper.identify_page(html_bytes, market_modules)
+        if market is False or page_type not in FIELDS:
+            continue
+        reference = extract_fields(scraper.get_soup_bytes(html_bytes, parser='html.parser'), market_modules[market],
+                                   page_type)
+
+        for backend, parse_only in backends:
+            name = backend + (' + parse_only' if parse_only else '')
+            strainer = getattr(market_modules[market], 'parse_only', None) if parse_only else None
+
+            start = time.perf_counter()
+            soup = scraper.get_soup_bytes(html_bytes, parse_only=strainer, parser=backend)
+            parsed = time.perf_counter()
+            fields = extract_fields(soup, market_modules[market], page_type)
+            extracted = time.perf_counter()
+
+            result = results.setdefault(market, {}).setdefault(name, {'pages': 0, 'parse': 0, 'extract': 0,
+                                                                      'different': {}})
+            result['pages'] += 1
+            result['parse'] += parsed - start
+            result['extract'] += extracted - parsed
+            for field in fields:
+                if fields[field] != reference[field]:
+                    result['different'][field] = result['different'].get(field, 0) + 1
+    return results
+
+
+def print_results(results):
+    """Prints a table per market with the average time per page in ms and the fields that differ"""
+    for market in sorted(results):
+        print(f'\n{market}')
+        print(f'{"backend":<28}{"pages":>6}{"parse ms":>10}{"extract ms":>12}  different fields')
+        for name, result in results[market].items():
+            different = ', '.join(f'{field} ({count})' for field, count in result['different'].items())
+            print(f'{name:<28}{result["pages"]:>6}{1000 * result["parse"] / result["pages"]:>10.2f}'
+                  f'{1000 * result["extract"] / result["pages"]:>12.2f}  {different if different else "-"}')
+
+
+if __name__ == "__main__":
+    # Folder with sample pages of the markets, for example the sorted files folder
+    if len(sys.argv) > 1:
+        sample_path = sys.argv[1]
+    else:
+        sample_path = input("Insert folder path with sample pages: ")
+
+    if not os.path.isdir(sample_path):
+        print("The sample path must be a directory")
+        sys.exit(0)
+
+    # Only the installed backends can be compared
+    backends = [('html.parser', False), ('html.parser', True)]
+    if importlib.util.find_spec('lxml') is not None:
+        backends += [('lxml', False), ('lxml', True)]
+    if importlib.util.find_spec('html5lib') is not None:
+        backends += [('html5lib', False)]
+
+    print_results(benchmark(scraper.open_folder(sample_path), backends))
+    sys.exit(0)
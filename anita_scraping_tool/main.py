@@ -1,8 +1,16 @@
 import os
 import sys
+import shutil
 import anita.ImportFile as importfile
 import anita.Scraper as scraper
 import anita.Merge as merge
+import anita.ExchangeRates as exchangerates
+import anita.Profiler as profiler
+import anita.ParseCache as parsecache
+import anita.RunJournal as runjournal
+import anita.Manifest as manifest
+import anita.SnapshotStore as snapshotstore
+import anita.ColumnarExport as columnarexport
 
 
 if __name__ == "__main__":
@@ -42,11 +50,113 @@ if __name__ == "__main__":
 
     os.system('cls' if os.name == 'nt' else 'clear')
 
+    # fused import and scrape
+    print('The pages can be scraped while they are imported, every page is then parsed only once')
+    print('Only the newly imported pages are scraped, instead of the whole sorted folder')
+    fused_pipeline = input("'Y' for scraping while importing, leave empty to import and scrape separately: ")
+    fused_pipeline = fused_pipeline.lower() == 'y'
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # manifest of the sorted folder, only used when the sorted folder is scraped after the import
+    repair_manifest = False
+    if not fused_pipeline:
+        print('The pages to scrape are taken from the manifest of the sorted folder, that is updated by the import')
+        print('Pages that are added, changed or removed outside the tool are only found by scanning the whole folder')
+        repair_manifest = input("'Y' for scanning the sorted folder to repair the manifest, leave empty to skip: ")
+        repair_manifest = repair_manifest.lower() == 'y'
+
+        os.system('cls' if os.name == 'nt' else 'clear')
+
+    # duplicate pages
+    print('Pages with the same content as a page of the same date that is already imported can be skipped, '
+          'they are only recorded')
+    deduplicate = input("'Y' for skipping duplicate pages, leave empty to import all pages: ")
+    deduplicate = deduplicate.lower() == 'y'
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # processes
+    processes = input("Number of processes used for scraping, leave empty to scrape in one process: ")
+
+    if processes == '':
+        processes = 1
+    elif not processes.isdigit() or int(processes) < 1:
+        print("The number of processes must be a positive number")
+        sys.exit(0)
+    else:
+        processes = int(processes)
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # exchange rates
+    print(f'The exchange rates for the prices are stored in: {exchangerates.store_path}')
+    rates_csv_path = input("Insert path of a CSV file with exchange rates to import (columns pair, date, rate), leave empty to skip: ")
+
+    if rates_csv_path != '':
+        if not os.path.isfile(rates_csv_path):
+            print("The exchange rates path must be a CSV file")
+            sys.exit(0)
+        print(f'{exchangerates.import_csv(rates_csv_path)} exchange rates imported')
+
+    offline_rates = input("'Y' for only using the stored exchange rates (offline), leave empty to request missing rates: ")
+    exchangerates.configure(offline_mode=offline_rates.lower() == 'y')
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # profiling of the market scrapers
+    profile_scrapers = input("'Y' for profiling the time spent per market and field, leave empty to skip: ")
+    profiler.enable(profile_scrapers.lower() == 'y')
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # parse cache
+    print('Pages that are scraped before by the same version of the scraper can be taken from a cache file')
+    cache_path = input("Insert path of the cache file (created if it does not exist), leave empty to not use a cache: ")
+    if cache_path != '':
+        parsecache.configure(cache_path)
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # storage of the merged data
+    print(f'The merged data can be stored in a SQLite file ({snapshotstore.store_name}) instead of JSON files')
+    use_store = input("'Y' for storing in SQLite, leave empty to store in JSON files: ")
+    use_store = use_store.lower() == 'y'
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # columnar datasets for the dashboard
+    print('The merged data can also be exported as Parquet or Feather datasets (product, vendor and feedback)')
+    print('Only the dumps of this run are added to the datasets, the package pyarrow is needed')
+    export_format = input("'parquet' or 'feather' for exporting the datasets, leave empty to not export them: ")
+    if export_format != '':
+        try:
+            columnarexport.configure(os.path.join(output_json_path, 'datasets'), export_format.lower())
+        except ValueError as e:
+            print(e)
+            sys.exit(0)
+
+    os.system('cls' if os.name == 'nt' else 'clear')
+
     # Summary & start
     print('SUMMARY')
     print(f'The following folder will be exported: {dump_path}')
     print(f'The filtered and sorted files will be stored in: {sorted_files_path}')
     print(f'The JSON files will be sort in: {output_json_path}')
+    print(f'Scraping while importing: {fused_pipeline}')
+    print(f'Scanning the sorted folder to repair the manifest: {repair_manifest}')
+    print(f'Skipping duplicate pages: {deduplicate}')
+    print(f'Number of processes used for scraping: {processes}')
+    print(f'Only using stored exchange rates: {exchangerates.offline}')
+    print(f'Profiling the market scrapers: {profiler.enabled}')
+    print(f'Cache file of the scraped pages: {parsecache.cache_path}')
+    print(f'Storing the merged data in SQLite: {use_store}')
+    print(f'Folder of the Parquet/Feather datasets: {columnarexport.export_folder}')
+
+    # journal of the run, an interrupted run is resumed where it stopped
+    journal = runjournal.RunJournal(os.path.join(sorted_files_path, 'run_journal.txt'))
+    if journal.resumed > 0:
+        print(f'An interrupted run is resumed, {journal.resumed} files that are already processed will be skipped')
     print('Is everything correct?')
     start_processing = input("'Y' for starting the process: ")
 
@@ -57,15 +167,42 @@ if __name__ == "__main__":
         print('Starting exporting the files...')
 
     # PROCESSING
-    print('Data filtering and moving started')
-    print('Depending on the size of the folder, this can take a lot of time')
-    importfile.import_files(dump_path, sorted_files_path, delete_files=True)
-    print(f'Data moving complete, filtered data can be found in: {sorted_files_path}')
+    if fused_pipeline:
+        print('Data filtering, moving and scraping started')
+        print('Depending on the size of the folder, this can take a lot of time')
+        data = importfile.import_and_scrape(dump_path, sorted_files_path, stream_zip=True, deduplicate=deduplicate,
+                                            journal=journal)
+        if type(data) == str:
+            print(data)
+            sys.exit(0)
+        print(f'Data moving and scraping complete, filtered data can be found in: {sorted_files_path}')
 
-    print('Scraping data from files started')
-    print('Depending on the size of the folder, this can take a lot of time')
-    data = scraper.json(sorted_files_path)
-    print('Scraping data from files completed')
+    else:
+        print('Data filtering and moving started')
+        print('Depending on the size of the folder, this can take a lot of time')
+        imported = importfile.import_files(dump_path, sorted_files_path, stream_zip=True, deduplicate=deduplicate,
+                                           journal=journal)
+        # the import failed, the dump is kept and the run can be resumed with the journal
+        if type(imported) == str:
+            print(imported)
+            sys.exit(0)
+        print(f'Data moving complete, filtered data can be found in: {sorted_files_path}')
+
+        # the pages are streamed from the scraper into the merge, one page at a time
+        print('Scraping data from files and merging duplicate vendors and products started')
+        print('Depending on the size of the folder, this can take a lot of time')
+        # the pages in the sorted store are taken from its manifest, that is updated by the import
+        # the folder is only scanned when the manifest is missing or empty, or when a repair is asked for
+        store_manifest = manifest.open_manifest(sorted_files_path)
+        try:
+            if repair_manifest:
+                added, removed = store_manifest.refresh()
+                print(f'The manifest of the sorted folder is repaired: {added} pages added or changed, '
+                      f'{removed} pages removed')
+            sorted_files = store_manifest.paths()
+        finally:
+            store_manifest.close()
+        data = scraper.iter_records(sorted_files, processes=processes, journal=journal)
 
     print('Merging duplicate vendors and products has started')
     merged_data = merge.merge_items(data)
@@ -73,7 +210,22 @@ if __name__ == "__main__":
 
     # SAVE JSON INTO THE OUTPUT FOLDER
     print('Exporting the data into JSON has started')
-    merge.store_json(merged_data, output_json_path)
+    if use_store:
+        store = snapshotstore.SnapshotStore(os.path.join(output_json_path, snapshotstore.store_name))
+        stored = merge.store_json(merged_data, output_json_path, store)
+        store.close()
+    else:
+        stored = merge.store_json(merged_data, output_json_path)
+    if type(stored) == str:
+        print(stored)
+        sys.exit(0)
+
+    # the run is completed, the dump and the journal are not needed anymore
+    if os.path.isfile(dump_path):
+        os.remove(dump_path)
+    elif os.path.isdir(dump_path):
+        shutil.rmtree(dump_path)
+    journal.remove()
 
     os.system('cls' if os.name == 'nt' else 'clear')
     print('The process has finished!')
@@ -81,5 +233,12 @@ if __name__ == "__main__":
     print(f'The filtered and sorted files will are stored in: {sorted_files_path}')
     print(f'The JSON files can be found here: {output_json_path}')
 
+    if profiler.enabled:
+        profile_path = os.path.join(output_json_path, 'scraper_profile.json')
+        profiler.export_json(profile_path)
+        print('\nTime spent per market and field:')
+        profiler.print_report(top=25)
+        print(f'The complete profile can be found here: {profile_path}')
+
     sys.exit(0)
 
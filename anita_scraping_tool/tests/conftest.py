@@ -0,0 +1,27 @@
+import os
+import shutil
+import pytest
+
+# The market modules are found relative to the folder of the tool (see Scraper.import_market_modules)
+tool_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+demo_folder = os.path.join(tool_folder, 'DATA_DEMONSTRATION_PURPOSES', 'BACKUP_FOR_TRYING_AGAIN', 'INPUT_PHASE_1')
+
+
+@pytest.fixture
+def market_modules(monkeypatch):
+    monkeypatch.chdir(tool_folder)
+    from anita.Scraper import import_market_modules
+    return import_market_modules()
+
+
+@pytest.fixture
+def demo_files(market_modules, monkeypatch, tmp_path):
+    """The demo pages imported in a sorted store"""
+    from anita import Scraper, ImportFile
+    # the prices are not converted, no exchange rates are needed
+    monkeypatch.setattr(Scraper, 'normalize_prices', lambda batch: batch)
+    sorted_path = str(tmp_path / 'sorted') + '/'
+    os.makedirs(sorted_path)
+    shutil.copytree(demo_folder, str(tmp_path / 'import'))
+    return sorted(ImportFile.import_files(str(tmp_path / 'import'), sorted_path))
@@ -0,0 +1,36 @@
+import os
+import shutil
+from conftest import tool_folder
+from anita import ImportFile
+from anita.ContentIndex import ContentIndex, index_name
+
+demo_folder = os.path.join(tool_folder, 'DATA_DEMONSTRATION_PURPOSES', 'BACKUP_FOR_TRYING_AGAIN', 'INPUT_PHASE_1',
+                           '2019_09_11')
+demo_page = 'drugsmedicine_1g_of_pure_uncut_peruvian_cocaine.htm'
+
+
+def add_page(folder, file_name):
+    os.makedirs(folder, exist_ok=True)
+    shutil.copy(os.path.join(demo_folder, demo_page), os.path.join(folder, file_name))
+
+
+def test_unchanged_page_is_imported_for_every_date(market_modules, tmp_path):
+    import_path = str(tmp_path / 'import')
+    sorted_path = str(tmp_path / 'sorted') + '/'
+    os.makedirs(sorted_path)
+    # the same page twice in the dump of the first date and once in the dump of the next date
+    add_page(os.path.join(import_path, '2019_09_11'), demo_page)
+    add_page(os.path.join(import_path, '2019_09_11', 'again'), 'copy_' + demo_page)
+    add_page(os.path.join(import_path, '2019_09_12'), demo_page)
+
+    moved_files = ImportFile.import_files(import_path, sorted_path, deduplicate=True)
+
+    assert sorted(moved_files) == [sorted_path + 'drugsmedicine/2019_09_11/2019_09_11_' + demo_page,
+                                   sorted_path + 'drugsmedicine/2019_09_12/2019_09_12_' + demo_page]
+    index = ContentIndex(os.path.join(sorted_path, index_name))
+    try:
+        assert index.duplicates() == {
+            sorted_path + 'drugsmedicine/2019_09_11/2019_09_11_again_copy_' + demo_page:
+                sorted_path + 'drugsmedicine/2019_09_11/2019_09_11_' + demo_page}
+    finally:
+        index.close()
@@ -0,0 +1,46 @@
+import os
+import pytest
+from anita import Manifest
+
+
+@pytest.fixture
+def sorted_store(tmp_path):
+    """A sorted store with one page"""
+    date_folder = tmp_path / 'sorted' / 'agartha' / '2020_01_01'
+    os.makedirs(str(date_folder))
+    (date_folder / '2020_01_01_agartha_page.html').write_text('<html></html>')
+    return str(tmp_path / 'sorted')
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """Counts the scans of the sorted store"""
+    scans = []
+
+    def counted_scan(folder_path):
+        scans.append(folder_path)
+        return scan_folder(folder_path)
+
+    scan_folder = Manifest.scan_folder
+    monkeypatch.setattr(Manifest, 'scan_folder', counted_scan)
+    return scans
+
+
+def test_missing_or_empty_manifest_is_created_from_the_store(sorted_store, scans):
+    Manifest.Manifest(sorted_store).close()  # an empty manifest
+    manifest = Manifest.open_manifest(sorted_store)
+    try:
+        assert manifest.markets() == {'agartha': ['2020_01_01']}
+        assert len(scans) == 1
+    finally:
+        manifest.close()
+
+
+def test_manifest_is_used_without_scanning_the_store(sorted_store, scans):
+    Manifest.open_manifest(sorted_store).close()
+    manifest = Manifest.open_manifest(sorted_store)
+    try:
+        assert len(manifest.paths()) == 1
+        assert len(scans) == 1
+    finally:
+        manifest.close()
@@ -0,0 +1,93 @@
+import datetime
+import json
+import pytest
+from anita import Merge
+
+
+def timestamp(day):
+    return datetime.datetime(2020, 1, day, 12).timestamp()
+
+
+def feedback(message, day=1, user='buyer', score=5):
+    return {'message': message, 'date': timestamp(day), 'user': user, 'score': score}
+
+
+def product(name, day, reviews, vendor='seller', price=10):
+    return {'web_page': {'market': 'agartha', 'page_type': 'product', 'date': timestamp(day)},
+            'page_data': {'name': name, 'vendor': vendor, 'feedback': reviews, 'price': price}}
+
+
+def vendor(name, day, reviews=None):
+    return {'web_page': {'market': 'agartha', 'page_type': 'vendor', 'date': timestamp(day)},
+            'page_data': {'name': name, 'feedback': reviews, 'registration': None}}
+
+
+@pytest.fixture
+def export_folder(tmp_path):
+    return str(tmp_path) + '/'
+
+
+def read_export(export_folder, day, page_type='product'):
+    with open(Merge.export_path(export_folder, 'agartha', '2020_01_%02d' % day, page_type)) as json_file:
+        return json.load(json_file)
+
+
+def test_same_feedback_is_merged_once():
+    merged = Merge.merge_items([product('pills', 1, [feedback('good'), feedback('fast', user='other')]),
+                                product('pills', 1, [feedback('good'), feedback('fast'), feedback('good', score=4)])])
+    reviews = list(merged.values())[0]['page_data']['feedback']
+    assert [(review['message'], review['user'], review['score']) for review in reviews] == \
+        [('good', 'buyer', 5), ('fast', 'other', 5), ('fast', 'buyer', 5), ('good', 'buyer', 4)]
+
+
+def test_feedback_key_needs_every_field():
+    assert Merge.feedback_key(feedback('good')) == Merge.feedback_key(dict(reversed(list(feedback('good').items()))))
+    assert Merge.feedback_key(feedback('good')) != Merge.feedback_key(feedback('good', day=2))
+    assert Merge.feedback_key(feedback('good')) != Merge.feedback_key(feedback('good', user='other'))
+
+
+def test_new_products_get_new_ids(export_folder):
+    Merge.store_json(Merge.merge_items([product('pills', 1, None), product('powder', 1, None),
+                                        product('pills', 1, None, vendor='other'), vendor('seller', 1)]),
+                     export_folder)
+    Merge.store_json(Merge.merge_items([product('pills', 2, None), product('tablets', 2, None)]), export_folder)
+
+    day_1 = read_export(export_folder, 1)
+    assert {product_id: (day_1[product_id]['page_data']['vendor'], day_1[product_id]['page_data']['name'])
+            for product_id in day_1} == {'agartha_product_1': ('seller', 'pills'),
+                                         'agartha_product_2': ('seller', 'powder'),
+                                         'agartha_product_3': ('other', 'pills')}
+    # the known product keeps its id, the new product gets the next id
+    day_2 = read_export(export_folder, 2)
+    assert {product_id: day_2[product_id]['page_data']['name'] for product_id in day_2} == \
+        {'agartha_product_1': 'pills', 'agartha_product_4': 'tablets'}
+    assert list(read_export(export_folder, 1, 'vendor')) == ['seller']
+
+
+def test_renamed_product_keeps_its_id(export_folder):
+    reviews = [feedback('good'), feedback('fast')]
+    Merge.store_json(Merge.merge_items([product('pills', 1, reviews), product('tablets', 1, None)]), export_folder)
+    ids = {day_1['page_data']['name']: product_id for product_id, day_1 in read_export(export_folder, 1).items()}
+
+    # the name changed, the reviews are the same
+    Merge.store_json(Merge.merge_items([product('pills 10mg', 2, reviews + [feedback('new', day=2)])]), export_folder)
+    assert read_export(export_folder, 2) == {ids['pills']: product('pills 10mg', 2, reviews + [feedback('new', day=2)])}
+
+
+def test_renamed_product_takes_the_id_of_the_last_product_of_the_vendor():
+    previous = {'agartha_product_1': product('pills', 1, [feedback('good')]),
+                'agartha_product_2': product('tablets', 1, [feedback('good'), feedback('fast')]),
+                'agartha_product_3': product('powder', 1, [feedback('slow')])}
+    review_index = Merge.build_review_index(previous)
+    assert review_index == {'good': {'agartha_product_1', 'agartha_product_2'}, 'fast': {'agartha_product_2'},
+                            'slow': {'agartha_product_3'}}
+
+    vendor_product_list = {'seller': ['agartha_product_1', 'agartha_product_2', 'agartha_product_3']}
+    renamed = product('pills 10mg', 2, [feedback('good')])
+    assert Merge.find_renamed_product(renamed, 'seller', vendor_product_list, review_index) == 'agartha_product_2'
+    vendor_product_list = {'seller': ['agartha_product_2', 'agartha_product_1', 'agartha_product_3']}
+    assert Merge.find_renamed_product(renamed, 'seller', vendor_product_list, review_index) == 'agartha_product_1'
+    # no reviews in common, or no reviews at all
+    assert Merge.find_renamed_product(product('pills', 2, [feedback('other')]), 'seller', vendor_product_list,
+                                      review_index) is None
+    assert Merge.find_renamed_product(product('pills', 2, None), 'seller', vendor_product_list, review_index) is None
@@ -0,0 +1,52 @@
+import os
+import shutil
+import pytest
+from anita import ParseCache
+
+
+@pytest.fixture
+def scraper_folder(monkeypatch, tmp_path):
+    """A copy of the source of the scraper, of which the version is computed again for every call"""
+    folder = str(tmp_path / 'anita')
+    os.makedirs(os.path.join(folder, 'MarketScraper'))
+    shutil.copy(os.path.join(ParseCache.scraper_folder, 'Scraper.py'), folder)
+    for file in ['MarketIdentifier.py', 'agartha.py', 'tochka.py']:
+        shutil.copy(os.path.join(ParseCache.scraper_folder, 'MarketScraper', file),
+                    os.path.join(folder, 'MarketScraper'))
+    monkeypatch.setattr(ParseCache, 'scraper_folder', folder)
+    return folder
+
+
+def new_version():
+    ParseCache.version = None
+    return ParseCache.scraper_version()
+
+
+def test_version_changes_with_every_market_module(scraper_folder, monkeypatch):
+    monkeypatch.setattr(ParseCache, 'version', None)
+    version = new_version()
+    assert new_version() == version
+
+    # a change to the fingerprint of another market
+    with open(os.path.join(scraper_folder, 'MarketScraper', 'tochka.py'), 'a') as module:
+        module.write('\nmarket_fingerprint = []\n')
+    changed_version = new_version()
+    assert changed_version != version
+
+    # an added market module
+    shutil.copy(os.path.join(ParseCache.scraper_folder, 'MarketScraper', 'agartha.py'),
+                os.path.join(scraper_folder, 'MarketScraper', 'agartha2.py'))
+    assert new_version() not in [version, changed_version]
+
+
+def test_record_of_another_version_is_not_loaded(market_modules, monkeypatch, tmp_path):
+    monkeypatch.setattr(ParseCache, 'cache_path', str(tmp_path / 'cache.sqlite'))
+    monkeypatch.setattr(ParseCache, 'cache', None)
+    monkeypatch.setattr(ParseCache, 'version', 'old')
+    record = {'web_page': {'market': 'agartha'}, 'page_data': {'name': 'pills'}}
+    ParseCache.store('key', record)
+    assert ParseCache.load('key', market_modules) == record
+
+    monkeypatch.setattr(ParseCache, 'version', 'new')
+    assert ParseCache.load('key', market_modules) is None
+    ParseCache.get_cache().close()
@@ -0,0 +1,39 @@
+from anita import Scraper
+from anita.RunJournal import RunJournal
+
+
+def names(records):
+    return [(record['web_page']['market'], record['page_data']['name']) for record in records]
+
+
+def test_resumed_run_keeps_the_order_of_the_files(demo_files, tmp_path):
+    journal_path = str(tmp_path / 'run_journal.txt')
+    uninterrupted = list(Scraper.iter_records(demo_files))
+
+    # the run is interrupted after the second file is scraped
+    journal = RunJournal(journal_path)
+    list(Scraper.iter_records(demo_files[1:2], journal=journal))
+    journal.close()
+
+    journal = RunJournal(journal_path)
+    assert journal.resumed == 1
+    resumed = list(Scraper.iter_records(demo_files, journal=journal))
+    journal.close()
+    assert names(resumed) == names(uninterrupted)
+
+
+def test_journal_keeps_only_the_status_in_memory(demo_files, tmp_path):
+    journal_path = str(tmp_path / 'run_journal.txt')
+    journal = RunJournal(journal_path)
+    records = list(Scraper.iter_records(demo_files, journal=journal))
+    journal.close()
+
+    journal = RunJournal(journal_path)
+    try:
+        assert all(len(entry) == 2 for entry in journal.entries.values())
+        assert journal.get('scrape', demo_files[0]) == {'status': 'scraped', 'target': None}
+        # the pages are read from the journal file, also when they are asked for in another order
+        for path, record in reversed(list(zip(demo_files, records))):
+            assert names([journal.record('scrape', path)]) == names([record])
+    finally:
+        journal.close()
@@ -0,0 +1,213 @@
+import os
+import pytest
+from conftest import demo_folder
+from anita import Scraper
+from anita.MarketScraper import MarketIdentifier
+
+
+def page(body, title=b'Market'):
+    return b'<html><head><title>' + title + b'</title></head><body>' + body + b'</body></html>'
+
+
+# Minimal pages of every market as (market, page_type, html), with the signature of the market and the parts the
+# pagetype function looks for. Together the pages of a market contain every entry of its fingerprints
+market_pages = [
+    ('agartha', 'product', page(b'<div id="page-heading"><h1>Agartha</h1></div><a class="btn btn-link btn-xs" '
+                                b'href="/">Home</a><a class="btn btn-link btn-xs" href="/listings">Listings</a>')),
+    ('agartha', 'vendor', page(b'<div id="page-heading"><h1>Agartha</h1></div>'
+                               b'<span class="user-class-hint"><strong>Vendor</strong></span>')),
+    ('apollon', 'product', page(b'<span class="bigger-90">Apollon Market</span><h3>Item For Sale : </h3>')),
+    ('apollon', 'vendor', page(b'<span class="bigger-90">Apollon Market</span><h3>User Profile : </h3>')),
+    ('berlusconi', 'product', page(b'<img alt="BERLUSCONI MARKET" src="logo.png">'
+                                   b'<button class="btn btn-block btn-danger btn-lg"> Buy Now </button>')),
+    ('berlusconi', 'vendor', page(b'<img alt="BERLUSCONI MARKET" src="logo.png">'
+                                  b'<span class="label label-primary">Vendor</span>')),
+    ('cannahome', 'product', page(b'<img alt="CannaHome" src="logo.png"><a class="btn big wide"> Order Product</a>')),
+    ('cannahome', 'vendor', page(b'<img alt="CannaHome" src="logo.png">'
+                                 b'<a class="btn wide purple arrow-right">View All Vendor\'s Listings</a>')),
+    ('cannazon', 'product', page(b'<h2 class="title text-center">Product Details</h2>'
+                                 b'<div class="footer-bottom">cannazon.market</div>')),
+    ('cannazon', 'vendor', page(b'<h2 class="title text-center">Vendor Profile</h2>'
+                                b'<div class="footer-bottom">Cannazon</div>')),
+    ('cannazon', 'vendor', page(b'<h2 class="title text-center">Vendor Profile</h2>'
+                                b'<div class="footer-bottom">CANNAZON</div>')),
+    ('darkmarket', 'product', page(b'<img alt="DarkMarket" src="logo.png"><ol class="breadcrumb"><li>Home</li>'
+                                   b'<li>Drugs</li></ol><div class="col-md-7"><button>Add to cart</button></div>')),
+    ('darkmarket', 'vendor', page(b'<img alt="DarkMarket" src="logo.png">'
+                                  b"<ol class='breadcrumb'><li>Home</li><li>Vendor</li></ol>")),
+    ('directdrugs', 'product', page(b'<div class="site-branding"><img alt="DirectDrugs. Buy research drugs." '
+                                    b'src="logo.png"></div><button name="add-to-cart">Add to cart</button>')),
+    ('drugscenter', 'product', page(b'<button name="add-to-cart">Add to cart</button>'
+                                    b'<div class="copyright-footer"><strong>drugs-center.biz</strong></div>')),
+    ('drugsmedicine', 'product', page(b'<div class="fix grid-3-12"><img id="logo_image" src="logo.png"></div>'
+                                      b'<div class="table_wrapper"><table><tr><th>Item info:</th></tr></table></div>',
+                                      b' Cocaine | Drugmarket ')),
+    ('drugsmedicine', 'vendor', page(b'<div class="fix grid-3-12"><img id="logo_image" src="logo.png"></div>'
+                                     b'<table class="msgtable"><tr><th>Vendor stats:</th></tr></table>',
+                                     b' fredthebaker | Drugmarket ')),
+    ('empiremarket', 'vendor', page(b'<h1 class="seth1">seller <i>| User Profile</i></h1>'
+                                    b'<div class="footer">Empire Market 2019</div>')),
+    ('palmetto', 'product', page(b'<div class="header"><strong>Palmetto State Armory</strong></div>'
+                                 b'<div class="short-description"><h2>Quick Overview</h2></div>')),
+    ('silkroad3', 'product', page(b'<div id="d">Silk Road 3.1</div><div id="vp"><h3>Place Order</h3></div>')),
+    ('silkroad3', 'vendor', page(b'<div id="d">Silk Road 3.1</div><div align="left">Last active: today</div>')),
+    ('tochka', 'product', page(b'<div class="ui segment"><h3>Details</h3></div><div class="ui segment">'
+                               b'<h3>Purchase</h3></div><a class="item" href="/">Tochka</a>')),
+    ('tochka', 'vendor', page(b'<h3 class="ui dividing header">About</h3><a class="item" href="/">Tochka</a>')),
+    ('tochka', 'vendor', page(b'<h3 class="ui dividing header">Reviews</h3><a class="item" href="/">Tochka</a>')),
+]
+
+# A page of no market with the parts that are on the pages of many markets
+generic_page = page(b'<img id="logo_image" src="logo.png"><a class="item" href="/about">About</a>'
+                    b'<a href="/cart">cart</a><p>Vendor</p><p>Reviews</p><p>Purchase</p>')
+
+
+def read_demo_page(folder, file_name):
+    with open(os.path.join(demo_folder, folder, file_name), 'rb') as html_file:
+        return html_file.read()
+
+
+@pytest.fixture
+def parse_counter(monkeypatch):
+    """Counts the soups that are created by the scraper"""
+    parses = []
+
+    def counted_soup(*args, **kwargs):
+        parses.append(args[1] if len(args) > 1 else None)
+        return soup_class(*args, **kwargs)
+
+    soup_class = Scraper.BeautifulSoup
+    monkeypatch.setattr(Scraper, 'BeautifulSoup', counted_soup)
+    monkeypatch.setattr(Scraper, 'fallback_parser', None)
+    return parses
+
+
+@pytest.fixture
+def unmatched_pages(monkeypatch):
+    """The pages without fingerprints that are counted by the scraper"""
+    monkeypatch.setattr(Scraper, 'unmatched_pages', {'pages': 0, 'data_pages': {}})
+    return Scraper.unmatched_pages
+
+
+def test_every_market_has_pages(market_modules):
+    assert set(market_modules) == set(market for market, page_type, html in market_pages)
+
+
+@pytest.mark.parametrize('market, page_type, html', market_pages)
+def test_market_page_is_identified_with_one_parse(market_modules, parse_counter, market, page_type, html):
+    assert Scraper.fingerprint_page(html, market_modules) == (market, [page_type])
+    soup, identified_market, identified_page_type = Scraper.identify_page(html, market_modules)
+    assert (identified_market, identified_page_type) == (market, page_type)
+    assert len(parse_counter) == 1
+
+
+def test_every_fingerprint_is_in_a_market_page(market_modules):
+    for market, module in market_modules.items():
+        for fingerprint in module.market_fingerprint:
+            assert any(fingerprint in html for page_market, page_type, html in market_pages if page_market == market), \
+                (market, fingerprint)
+        for page_type, fingerprints in module.page_fingerprint.items():
+            pages = [html for page_market, market_page_type, html in market_pages
+                     if (page_market, market_page_type) == (market, page_type)]
+            for fingerprint in fingerprints:
+                assert any(Scraper.find_fingerprint(fingerprint, html) for html in pages), (market, fingerprint)
+
+
+def test_page_without_data_is_parsed_once(market_modules, parse_counter):
+    # the fingerprints say it can be a product page, the soup says it is not
+    html = page(b'<div class="fix grid-3-12"><img id="logo_image" src="logo.png"></div><p>Item info:</p>',
+                b' Home | Drugmarket ')
+    soup, market, page_type = Scraper.identify_page(html, market_modules)
+    assert (market, page_type) == ('drugsmedicine', None)
+    assert len(parse_counter) == 1
+
+
+@pytest.mark.parametrize('parser, parses', [('lxml', 2), ('html.parser', 1)])
+def test_page_is_parsed_again_when_pagetype_needs_the_full_page(market_modules, parse_counter, monkeypatch, parser,
+                                                                parses):
+    # only lxml parses a part of the page, the other parsers already parse the whole page
+    monkeypatch.setattr(Scraper, 'parser_backend', parser)
+    monkeypatch.setattr(market_modules['drugsmedicine'], 'pagetype_full_page', True, raising=False)
+    html = page(b'<div class="fix grid-3-12"><img id="logo_image" src="logo.png"></div><p>Item info:</p>',
+                b' Home | Drugmarket ')
+    Scraper.identify_page(html, market_modules)
+    assert len(parse_counter) == parses
+
+
+@pytest.mark.parametrize('parser', ['lxml', 'html.parser'])
+def test_market_pages_are_identified_with_every_parser(market_modules, monkeypatch, parser):
+    monkeypatch.setattr(Scraper, 'parser_backend', parser)
+    for market, page_type, html in market_pages:
+        soup, identified_market, identified_page_type = Scraper.identify_page(html, market_modules)
+        assert (identified_market, identified_page_type) == (market, page_type)
+        assert (soup.head is None) == (parser == 'lxml'), market
+
+
+def test_page_is_parsed_again_with_the_fallback_parser(market_modules, parse_counter, monkeypatch):
+    monkeypatch.setattr(Scraper, 'fallback_parser', 'html.parser')
+    html = page(b'<div class="fix grid-3-12"><img id="logo_image" src="logo.png"></div><p>Item info:</p>',
+                b' Home | Drugmarket ')
+    Scraper.identify_page(html, market_modules)
+    assert len(parse_counter) == 2
+
+
+def test_page_without_fingerprints_is_identified_with_the_soup(market_modules, unmatched_pages):
+    # the drugsmedicine product page without the name of the site in the title
+    html = [html for market, page_type, html in market_pages if (market, page_type) == ('drugsmedicine', 'product')][0]
+    html = html.replace(b'| Drugmarket', b'')
+    assert Scraper.fingerprint_page(html, market_modules) == (None, [])
+    soup, market, page_type = Scraper.identify_page(html, market_modules)
+    assert (market, page_type) == ('drugsmedicine', 'product')
+    assert unmatched_pages == {'pages': 1, 'data_pages': {'drugsmedicine': 1}}
+
+
+def test_market_of_the_fingerprint_is_confirmed_with_the_signature(market_modules):
+    # another site that mentions Tochka
+    html = page(b'<h3 class="ui dividing header">About</h3><p>We are not Tochka</p>')
+    assert Scraper.fingerprint_page(html, market_modules) == ('tochka', ['vendor'])
+    soup, market, page_type = Scraper.identify_page(html, market_modules)
+    assert market is False
+
+
+def test_page_of_no_market_is_not_identified(market_modules, unmatched_pages):
+    assert MarketIdentifier.identify_market_bytes(generic_page) == []
+    assert Scraper.fingerprint_page(generic_page, market_modules) == (None, [])
+    assert Scraper.identify_page(generic_page, market_modules)[1] is False
+    assert unmatched_pages == {'pages': 1, 'data_pages': {}}
+
+
+def test_pages_of_other_markets_are_not_identified(market_modules):
+    for market, module in market_modules.items():
+        html = generic_page.replace(b'<title>Market</title>', b'<title>' + module.market_fingerprint[0] + b'</title>')
+        assert MarketIdentifier.identify_market_bytes(html) == [market], market
+
+
+def test_demo_pages_are_identified(market_modules, unmatched_pages):
+    pages = {('2019_09_11', 'drugsmedicine_1g_of_pure_uncut_peruvian_cocaine.htm'): ('drugsmedicine', 'product'),
+             ('2019_09_11', '2019_09_11_drugsmedicine_fredthebaker_2.htm'): ('drugsmedicine', 'vendor'),
+             ('2021_08_02', '2019_09_11_berlusconi_c=listings&a=product&code=0a07869e4f96&tab=2.htm'):
+                 ('berlusconi', 'product')}
+    for (folder, file_name), (market, page_type) in pages.items():
+        soup, identified_market, identified_page_type = Scraper.identify_page(read_demo_page(folder, file_name),
+                                                                               market_modules)
+        assert (identified_market, identified_page_type) == (market, page_type), file_name
+    assert unmatched_pages['pages'] == 0
+
+
+def test_darkmarket_page_types_need_the_parts_of_pagetype(market_modules):
+    listing = page(b'<img alt="DarkMarket" src="logo.png"><a href="/cart">cart</a><ol class="breadcrumb"><li>Home</li>'
+                   b'<li>Drugs</li></ol><table><tr><th>Vendor</th></tr></table><div class="col-md-7"></div>')
+    assert Scraper.fingerprint_page(listing, market_modules) == (None, [])
+
+
+def test_tochka_page_types_need_the_headers_of_pagetype(market_modules):
+    html = page(b'<div class="ui menu"><a class="item">About</a><a class="item">Reviews</a>'
+                b'<a class="item">Purchase</a><a class="item">Tochka</a></div>')
+    assert Scraper.fingerprint_page(html, market_modules) == (None, [])
+
+
+def test_extract_data_scrapes_in_parallel(demo_files):
+    serial = Scraper.extract_data(demo_files)
+    assert [record['page_data']['name'] for record in serial] == \
+        [record['page_data']['name'] for record in Scraper.iter_records(demo_files)]
+    assert Scraper.extract_data(demo_files, processes=2) == serial
@@ -21,6 +21,7 @@ import numpy as np
 # import own modules
 network_graph = importlib.import_module('networkgraph')
 plots = importlib.import_module('plots')
+datastore = importlib.import_module('datastore')
 
 # Setup the server of DASH
 app = dash.Dash(
@@ -29,8 +30,17 @@ app = dash.Dash(
 server = app.server
 
 # ------ Data
-df_product = pd.read_csv('data/df_product.csv')
-df_vendor = pd.read_csv('data/df_vendor.csv')
+# The data is sorted by market and extraction date and indexed once, the callbacks select from the stores
+product_store = datastore.DataStore(pd.read_csv('data/df_product.csv'), ['name', 'vendor', 'product_id'])
+vendor_store = datastore.DataStore(pd.read_csv('data/df_vendor.csv'), ['name', 'pgp'], ['name', 'pgp'])
+df_product = product_store.df
+df_vendor = vendor_store.df
+
+# The names of the vendors of the pgp's, used as label of the pgp's {pgp : name}
+pgp_names = vendor_store.value_map('pgp', 'name')
+
+# The identities of the vendors (names joined by shared pgp's) for the network graph
+identity_graph = network_graph.IdentityGraph(df_vendor)
 
 
 # ------ (helper) Functions
@@ -67,13 +77,15 @@ def get_date_list():
     return date_dict, min_date, max_date
 
 
-def filter_df(df, market_list, start_date, end_date):
+def filter_df(store, market_list, start_date, end_date, column=None, value=None):
     """
     Filters the DF based on given parameters
-    :param df: the DF to filter (can be df_vendor or df_product, or a df with same column names)
+    :param store: the DataStore of the DF to filter (product_store or vendor_store)
     :param market_list: a list of the markets (e.g. ['berlusconi', 'agartha'])
     :param start_date: date as datetime object
     :param end_date: date as datetime object
+    :param column: str, optional, only the rows where this column has the value (e.g. 'name')
+    :param value: the value of the column
     :return: df, the filtered df
     """
     # get the unix values for the start and end date
@@ -81,37 +93,30 @@ def filter_df(df, market_list, start_date, end_date):
     end_date_unix = time.mktime(end_date.timetuple())
 
     # Filter actions
-    df = df[df['market'].isin(market_list)]
-    df = df[df['extraction_date'] >= start_date_unix]
-    df = df[df['extraction_date'] <= end_date_unix]
+    return store.select(market_list, start_date_unix, end_date_unix, column, value)
 
-    return df
 
-
-def filter_df_market(df, market_list):
+def filter_df_market(store, market_list):
     """
     Filters the DF, similar ot filter DF, but only filters on market list
-    :param df: the DF to filter (can be df_vendor or df_product, or a df with same column names)
+    :param store: the DataStore of the DF to filter (product_store or vendor_store)
     :param market_list: a list of the markets (e.g. ['berlusconi', 'agartha'])
     :return: df, the filtered df
     """
-    return df[df['market'].isin(market_list)]
+    return store.select(market_list)
 
 
-def get_duplicate(df, column):
+def get_duplicate(store, market_list, column):
     """
     Get the duplicate values for a given column over the different markets.
     Thus if column = 'name' it will return all the values for 'name' that are duplicate over the different markets
-    :param df: the DF to use (can be df_vendor or df_product, or a df with same column names)
+    The duplicates are found once when the data is loaded, see datastore
+    :param store: the DataStore to use (vendor_store)
+    :param market_list: a list of the markets (e.g. ['berlusconi', 'agartha'])
     :param column: str, the column name to look for duplicates
     :return: set of the duplicate values
     """
-    # Initiate a list to store duplicates
-    duplicate = []
-    for index in df.groupby(['market', column]).count().index:
-        duplicate.append(index[1])
-    # return only values that are stored more than once in the list
-    return set([value for value in duplicate if duplicate.count(value) > 1])
+    return store.duplicates(column, market_list)
 
 
 def check_value(value):
@@ -556,8 +561,8 @@ def update_mini_containers(start_date, end_date, market_list):
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
 
     # Filter both data sets:
-    df_selection_product = filter_df(df_product, market_list, dt_start_date, dt_end_date)
-    df_selection_vendor = filter_df(df_vendor, market_list, dt_start_date, dt_end_date)
+    df_selection_product = filter_df(product_store, market_list, dt_start_date, dt_end_date)
+    df_selection_vendor = filter_df(vendor_store, market_list, dt_start_date, dt_end_date)
 
     unique_dumps = list(set(
         df_selection_product.extraction_date.unique().tolist() + df_selection_vendor.extraction_date.unique().tolist()))
@@ -613,8 +618,8 @@ def create_graph_unique(start_date, end_date, market_list):
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
 
     # Filter data sets
-    df_selection_vendor = filter_df(df_vendor, market_list, dt_start_date, dt_end_date)
-    df_selection_product = filter_df(df_product, market_list, dt_start_date, dt_end_date)
+    df_selection_vendor = filter_df(vendor_store, market_list, dt_start_date, dt_end_date)
+    df_selection_product = filter_df(product_store, market_list, dt_start_date, dt_end_date)
 
     # Find the x, y and text (for hover) data
     x_values_vendor = df_selection_vendor.groupby('market').count().index
@@ -641,10 +646,8 @@ def get_number_of_duplicates(market_list):
     :param market_list: list of strings of market names
     :return: Str: For the different html.P values
     """
-    df_selection_vendor = filter_df_market(df_vendor, market_list)
-
-    return f"{len(get_duplicate(df_selection_vendor, 'name'))} duplicate names found", \
-           f"{len(get_duplicate(df_selection_vendor, 'pgp'))} duplicate pgp's found"
+    return f"{len(get_duplicate(vendor_store, market_list, 'name'))} duplicate names found", \
+           f"{len(get_duplicate(vendor_store, market_list, 'pgp'))} duplicate pgp's found"
 
 
 # Radio Item PGP/Name & Market selection -> dropdown options
@@ -660,12 +663,10 @@ def update_duplicate_dropdown(value, market_list):
     :param market_list: list of strings of market names
     :return: list of dicts, options for dropdown
     """
-    df_selection_vendor = filter_df_market(df_vendor, market_list)
     if value == 'Name':
-        return [{'label': i, 'value': i} for i in get_duplicate(df_selection_vendor, 'name')]
+        return [{'label': i, 'value': i} for i in get_duplicate(vendor_store, market_list, 'name')]
     if value == 'PGP':
-        return [{'label': df_vendor[df_vendor['pgp'] == i]['name'].unique()[0], 'value': i} for i in
-                get_duplicate(df_selection_vendor, 'pgp')]
+        return [{'label': pgp_names[i], 'value': i} for i in get_duplicate(vendor_store, market_list, 'pgp')]
 
 
 # PGP/Name & Market selection &  visibility product -> network graph
@@ -705,7 +706,7 @@ def create_network_graph(name_pgp, value, show_product):
         show_product_boolean = False
 
     # Get the nodes and edges
-    nodes, edges = network_graph.get_nodes_and_edges(df_vendor, df_product, name_pgp, value,
+    nodes, edges = network_graph.get_nodes_and_edges(identity_graph, df_product, name_pgp, value,
                                                      products=show_product_boolean)
 
     return network_graph.create_network_graph(nodes, edges)
@@ -784,9 +785,8 @@ def show_more_information(clickdata, figure):
             for market in market_list:
                 try:
                     # Get the data per market, the vendor can be attached to multiple markets (duplicate)
-                    data_row = \
-                        df_vendor[(df_vendor['name'] == point_text) & (df_vendor['market'] == market)].sort_values(
-                            'extraction_date').iloc[0]
+                    # the selection is sorted on extraction date
+                    data_row = vendor_store.select([market], column='name', value=point_text).iloc[0]
                 except IndexError:
                     continue
                 try:
@@ -906,11 +906,9 @@ def show_more_information(clickdata, figure):
 
             # Get the re-engineerd market
             market = text_list[market_to_check_index[market_to_check.index(min(market_to_check))]]
-            max_export_date = df_product[(df_product['market'] == market) & (df_product['name'] == point_text)][
-                'extraction_date'].max()
-            latest_product = \
-                df_product[(df_product['market'] == market) & (df_product['name'] == point_text)].sort_values(
-                    'extraction_date', ascending=False).iloc[0]
+            df_selection_product = product_store.select([market], column='name', value=point_text)
+            max_export_date = df_selection_product['extraction_date'].max()
+            latest_product = df_selection_product.iloc[-1]  # the selection is sorted on extraction date
 
             # Create HTML format
             info_html = html.Div([
@@ -950,10 +948,12 @@ def show_more_information(clickdata, figure):
         # MARKET
         if node_type == 'market':
             market = point_text
-            min_export_unix = min(df_vendor[df_vendor['market'] == market]['extraction_date'].min(),
-                                  df_product[df_product['market'] == market]['extraction_date'].min())
-            max_export_unix = max(df_vendor[df_vendor['market'] == market]['extraction_date'].max(),
-                                  df_product[df_product['market'] == market]['extraction_date'].max())
+            df_market_vendor = vendor_store.select([market])
+            df_market_product = product_store.select([market])
+            min_export_unix = min(df_market_vendor['extraction_date'].min(),
+                                  df_market_product['extraction_date'].min())
+            max_export_unix = max(df_market_vendor['extraction_date'].max(),
+                                  df_market_product['extraction_date'].max())
 
             # Create HTML
             info_html = html.Div([
@@ -963,18 +963,18 @@ def show_more_information(clickdata, figure):
                 dcc.Markdown(f"**Last export** : {datetime.fromtimestamp(max_export_unix).date()}"),
                 dcc.Markdown(f"**First export** : {datetime.fromtimestamp(min_export_unix).date()}"),
                 dcc.Markdown(
-                    f"**Number of exports** : {check_value(df_vendor[df_vendor['market'] == market].extraction_date.nunique())}"),
+                    f"**Number of exports** : {check_value(df_market_vendor.extraction_date.nunique())}"),
                 dcc.Markdown(
-                    f"**Number of unique products** : {check_value(df_product[df_product['market'] == market].product_id.nunique())}"),
+                    f"**Number of unique products** : {check_value(df_market_product.product_id.nunique())}"),
                 dcc.Markdown(
-                    f"**Number of unique vendors** : {check_value(df_vendor[df_vendor['market'] == market].name.nunique())}"),
+                    f"**Number of unique vendors** : {check_value(df_market_vendor.name.nunique())}"),
             ])
 
         # PGP
         if node_type == 'pgp':
             pgp_list = []
             for vendor in vendor_list:
-                pgp_list += df_vendor[df_vendor['name'] == vendor]['pgp'].unique().tolist()
+                pgp_list += vendor_store.lookup('name', vendor)['pgp'].unique().tolist()
 
             info_html = html.Div([
                 html.B(f'{node_type}'),
@@ -1011,8 +1011,8 @@ def update_market_search(start_date, end_date, market_list):
     """
     dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-    df_selection_vendor = filter_df(df_vendor, market_list, dt_start_date, dt_end_date)
-    df_selection_product = filter_df(df_product, market_list, dt_start_date, dt_end_date)
+    df_selection_vendor = filter_df(vendor_store, market_list, dt_start_date, dt_end_date)
+    df_selection_product = filter_df(product_store, market_list, dt_start_date, dt_end_date)
 
     return [{'label': i, 'value': i} for i in df_selection_vendor.market.unique().tolist()], \
            [{'label': i, 'value': i} for i in df_selection_product.market.unique().tolist()]
@@ -1037,7 +1037,7 @@ def update_vendor_dropdown(start_date, end_date, market_list):
     """
     dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-    df_selection_vendor = filter_df(df_vendor, [market_list], dt_start_date, dt_end_date)
+    df_selection_vendor = filter_df(vendor_store, [market_list], dt_start_date, dt_end_date)
 
     return [{'label': i, 'value': i} for i in df_selection_vendor.name.unique().tolist()]
 
@@ -1070,8 +1070,7 @@ def update_date_dropdown_vendor(vendor, start_date, end_date, market_list):
 
     dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-    df_selection_vendor = filter_df(df_vendor, [market_list], dt_start_date, dt_end_date)
-    df_selection_vendor = df_selection_vendor[df_selection_vendor['name'] == vendor]
+    df_selection_vendor = filter_df(vendor_store, [market_list], dt_start_date, dt_end_date, 'name', vendor)
 
     return [{'label': datetime.fromtimestamp(i).date(), 'value': i} for i in
             df_selection_vendor.extraction_date.unique().tolist()], df_selection_vendor.extraction_date.unique().max()
@@ -1112,9 +1111,8 @@ def update_vendor_info_div(dump, vendor, start_date, end_date, market_list):
 
         dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        df_selection = filter_df(df_vendor, [market_list], dt_start_date, dt_end_date)
-        df_selection_recent = \
-            df_selection[(df_selection['extraction_date'] == dump) & (df_selection['name'] == vendor)].iloc[0]
+        df_selection = filter_df(vendor_store, [market_list], dt_start_date, dt_end_date)
+        df_selection_recent = vendor_store.select([market_list], dump, dump, 'name', vendor).iloc[0]
 
         # Try to receive available information
         try:
@@ -1232,8 +1230,7 @@ def create_vendor_trend_plot(vendor, feature, start_date, end_date, market_list)
     else:
         dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        df_selection = filter_df(df_vendor, [market_list], dt_start_date, dt_end_date)
-        df_selection = df_selection[df_selection['name'] == vendor]
+        df_selection = filter_df(vendor_store, [market_list], dt_start_date, dt_end_date, 'name', vendor)
 
         if feature == 'score':
             feature = 'score_normalized'
@@ -1281,7 +1278,7 @@ def update_vendor_dropdown_product(start_date, end_date, market_list):
     """
     dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-    df_selection_product = filter_df(df_product, [market_list], dt_start_date, dt_end_date)
+    df_selection_product = filter_df(product_store, [market_list], dt_start_date, dt_end_date)
 
     return [{'label': 'all vendors', 'value': 'all'}] + [{'label': i, 'value': i} for i in
                                                          df_selection_product.vendor.unique().tolist()]
@@ -1307,10 +1304,10 @@ def update_vendor_dropdown(start_date, end_date, market_list, vendor):
     """
     dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-    df_selection_product = filter_df(df_product, [market_list], dt_start_date, dt_end_date)
-
     if vendor != 'all':
-        df_selection_product = df_selection_product[df_selection_product['vendor'] == vendor]
+        df_selection_product = filter_df(product_store, [market_list], dt_start_date, dt_end_date, 'vendor', vendor)
+    else:
+        df_selection_product = filter_df(product_store, [market_list], dt_start_date, dt_end_date)
 
     return [{'label': i, 'value': i} for i in df_selection_product.name.unique().tolist()]
 
@@ -1340,8 +1337,7 @@ def update_product_dump_dropdown(product, start_date, end_date, market):
         return [], None
     dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
     dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-    df_selection_product = filter_df(df_product, [market], dt_start_date, dt_end_date)
-    df_selection_product = df_selection_product[df_selection_product['name'] == product]
+    df_selection_product = filter_df(product_store, [market], dt_start_date, dt_end_date, 'name', product)
 
     return [{'label': datetime.fromtimestamp(i).date(), 'value': i} for i in
             df_selection_product.extraction_date.unique().tolist()], df_selection_product.extraction_date.unique().max()
@@ -1379,9 +1375,8 @@ def update_product_div(product, dump, start_date, end_date, market):
     else:
         dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        df_selection = filter_df(df_product, [market], dt_start_date, dt_end_date)
-        df_selection_recent = df_selection[df_selection['extraction_date'] == dump]
-        df_selection_recent = df_selection_recent[df_selection['name'] == product].iloc[0]
+        df_selection = filter_df(product_store, [market], dt_start_date, dt_end_date)
+        df_selection_recent = product_store.select([market], dump, dump, 'name', product).iloc[0]
 
         # Try to retrieve all information
         try:
@@ -1503,8 +1498,7 @@ def update_vendor_graph(product, start_date, end_date, market):
     else:
         dt_start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         dt_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        df_selection = filter_df(df_product, [market], dt_start_date, dt_end_date)
-        df_selection = df_selection[df_selection['name'] == product]
+        df_selection = filter_df(product_store, [market], dt_start_date, dt_end_date, 'name', product)
         html_info = dcc.Graph(
             id='trend_id',
             figure=plots.trend_plot(df_selection, 'price_eur', product, market)),
@@ -0,0 +1,160 @@
+"""
+datastore.py
+This module is part of the visualisation tool of ANITA
+
+This module contains the data store used by the callbacks of the dashboard to select rows of df_product and df_vendor
+The rows are sorted once by market and extraction date. Per market the range of rows is kept, thus the rows of a market
+and a date range are found with a binary search and taken as a slice of the df, instead of scanning the whole df.
+For the columns that are looked up by value (e.g. name, pgp, product_id) an index {value : row numbers} is kept.
+The last selections are kept in a cache, one change of a filter fires multiple callbacks that select the same rows.
+The values that are found on multiple markets (duplicates, e.g. the same vendor name or pgp) are found once at load.
+"""
+
+# ----- IMPORTS
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class DataStore:
+    """
+    The rows of a df (df_product or df_vendor) sorted by market and extraction date, with the row ranges per market and
+    the indexes of the columns that are looked up by value
+    """
+
+    def __init__(self, df, index_columns, duplicate_columns=(), cache_size=64):
+        """
+        :param df: the df to store (df_vendor or df_product, or a df with the same column names)
+        :param index_columns: list of the columns that are looked up by value (e.g. ['name', 'pgp'])
+        :param duplicate_columns: list of the columns of which the duplicates over the markets are needed
+        :param cache_size: int, the number of selections kept in the cache
+        """
+        # stable sort, the order of the rows within a market and date is kept
+        self.df = df.sort_values(['market', 'extraction_date'], kind='mergesort').reset_index(drop=True)
+        self.dates = self.df['extraction_date'].to_numpy()
+
+        # the range of rows of every market {market : (first row, last row + 1)}
+        self.market_ranges = {}
+        markets = self.df['market'].to_numpy()
+        if len(markets) > 0:
+            starts = np.flatnonzero(markets[1:] != markets[:-1]) + 1
+            bounds = [0] + starts.tolist() + [len(markets)]
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                self.market_ranges[markets[start]] = (start, stop)
+
+        # the rows of every value of the index columns {column : {value : sorted row numbers}}
+        self.indexes = {column: self.df.groupby(column, sort=False).indices for column in index_columns}
+
+        # the values that are on more than one market, per market {column : {market : set of values}}
+        # a value that is on one market only can not be a duplicate in a selection of markets, thus is not kept
+        self.duplicate_values = {}
+        for column in duplicate_columns:
+            market_count = self.df.groupby(column)['market'].nunique()
+            candidates = self.df[self.df[column].isin(market_count.index[market_count > 1])]
+            self.duplicate_values[column] = {market: set(values) for market, values in
+                                             candidates.groupby('market')[column].unique().items()}
+
+        # the last selections {(markets, start_unix, end_unix, column, value) : df}, least recently used first
+        # the callbacks run in multiple threads, thus the cache is locked
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+
+    def markets(self):
+        """
+        :return: list of the markets in the store
+        """
+        return list(self.market_ranges)
+
+    def date_range(self, market, start_unix=None, end_unix=None):
+        """
+        Finds the rows of the market between the start and end date (both included) with a binary search
+        :param market: str, name of the market
+        :param start_unix: float or None, the start date in unix time, None for no start date
+        :param end_unix: float or None, the end date in unix time, None for no end date
+        :return: tuple, (first row, last row + 1) of the rows
+        """
+        if market not in self.market_ranges:
+            return 0, 0
+        start, stop = self.market_ranges[market]
+        market_dates = self.dates[start:stop]
+        first = 0 if start_unix is None else np.searchsorted(market_dates, start_unix, side='left')
+        last = len(market_dates) if end_unix is None else np.searchsorted(market_dates, end_unix, side='right')
+        return start + first, start + max(first, last)
+
+    def rows(self, market_list, start_unix=None, end_unix=None, column=None, value=None):
+        """
+        Finds the row numbers of the selection, see select
+        :return: np.array of the sorted row numbers
+        """
+        # a market that is in the list twice is selected once
+        ranges = [self.date_range(market, start_unix, end_unix) for market in dict.fromkeys(market_list)]
+        if column is None:
+            return np.concatenate([np.arange(start, stop) for start, stop in ranges] + [np.array([], dtype=int)])
+        value_rows = self.indexes[column].get(value, np.array([], dtype=int))
+        return np.concatenate([value_rows[np.searchsorted(value_rows, start):np.searchsorted(value_rows, stop)]
+                               for start, stop in ranges] + [np.array([], dtype=int)])
+
+    def select(self, market_list, start_unix=None, end_unix=None, column=None, value=None):
+        """
+        Selects the rows of the markets between the start and end date, optionally only the rows where the column has
+        the value (the column needs to be one of the index columns)
+        :param market_list: a list of the markets (e.g. ['berlusconi', 'agartha'])
+        :param start_unix: float or None, the start date in unix time, None for no start date
+        :param end_unix: float or None, the end date in unix time, None for no end date
+        :param column: str or None, the index column to select on
+        :param value: the value of the column
+        :return: df, the selected rows sorted by market and extraction date, the df is shared with other callbacks and
+        should not be changed
+        """
+        key = (tuple(market_list), start_unix, end_unix, column, value)
+        with self.cache_lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+
+        # one market without a value is a slice of the df
+        if column is None and len(market_list) == 1:
+            start, stop = self.date_range(market_list[0], start_unix, end_unix)
+            selection = self.df.iloc[start:stop]
+        else:
+            selection = self.df.iloc[self.rows(market_list, start_unix, end_unix, column, value)]
+
+        with self.cache_lock:
+            self.cache[key] = selection
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return selection
+
+    def duplicates(self, column, market_list):
+        """
+        Get the duplicate values for a given column over the markets in the market_list.
+        Thus if column = 'name' it will return all the values for 'name' that are on more than one of the markets
+        :param column: str, the column name to look for duplicates (needs to be one of the duplicate columns)
+        :param market_list: a list of the markets (e.g. ['berlusconi', 'agartha'])
+        :return: set of the duplicate values
+        """
+        seen = set()
+        duplicate = set()
+        for market in dict.fromkeys(market_list):
+            values = self.duplicate_values[column].get(market, set())
+            duplicate |= seen & values
+            seen |= values
+        return duplicate
+
+    def value_map(self, key_column, value_column):
+        """
+        Creates a map of the values of a column to the value of another column in the first row with the value,
+        e.g. {pgp : name} for the names of the pgp's
+        :return: dict, {value of key_column : value of value_column}
+        """
+        first_rows = self.df.drop_duplicates(key_column)
+        return dict(zip(first_rows[key_column], first_rows[value_column]))
+
+    def lookup(self, column, value):
+        """
+        Selects the rows of all markets where the column has the value (the column needs to be one of the index
+        columns)
+        :return: df, the selected rows sorted by market and extraction date
+        """
+        return self.df.iloc[self.indexes[column].get(value, np.array([], dtype=int))]
@@ -7,7 +7,10 @@ This module contains all the functions for the creation of the network graph
 
 
 ##### NETWORK GRAPH
+import threading
+from collections import OrderedDict
 import networkx as nx
+import pandas as pd
 import plotly.graph_objs as go
 
 # Specific colors used for the different nodes
@@ -19,11 +22,111 @@ node_colors = {
     'pgp': 'orange',
 }
 
+# Above this number of nodes the spring layout is used instead of the (slow) kamada kawai layout
+kamada_kawai_max_nodes = 100
 
-def get_nodes_and_edges(df_vendor, df_product, name_pgp, value, products=False):
+# Seed of the spring layout, the same graph gets the same layout
+layout_seed = 42
+
+# The layouts of the last network graphs {(nodes, edges) : positions}, least recently used first
+layout_cache_size = 32
+layout_cache = OrderedDict()
+layout_cache_lock = threading.Lock()
+
+
+class IdentityGraph:
+    """
+    The identity graph of all vendors: vendors (names) that share a pgp are the same identity, and through them other
+    names of their pgp's (multiple hops). The identities are found once with union-find, per identity the edges of the
+    network graph are kept, thus the network of a name or pgp is a lookup of its identity.
+    """
+
+    def __init__(self, df_vendor):
+        """
+        :param df_vendor: df, df of vendor used in app.py
+        """
+        # the unique (name, market, pgp) of the vendors, vendors without name are not in the graph
+        rows = df_vendor[['name', 'market', 'pgp']].drop_duplicates()
+        rows = rows[rows['name'].notna()]
+        vendors = [(name, market, pgp if pd.notna(pgp) else None) for name, market, pgp in rows.to_numpy()]
+
+        # union-find over the name and pgp nodes, a name is joined with its pgp
+        self.parent = {}
+        for name, market, pgp in vendors:
+            self.union((name, 'vendor'), (name, 'vendor'))
+            if pgp is not None:
+                self.union((name, 'vendor'), (pgp, 'pgp'))
+
+        # the vendors of every identity {root node : [(name, market, pgp)]}
+        identities = {}
+        for vendor in vendors:
+            identities.setdefault(self.find((vendor[0], 'vendor')), []).append(vendor)
+
+        # the edges of every identity {root node : edges}, see identity_edges
+        self.edges = {root: identity_edges(identity_vendors) for root, identity_vendors in identities.items()}
+
+    def find(self, node):
+        """
+        :return: the root node of the identity of the node
+        """
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # path compression, the nodes on the path point to the root directly
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+
+    def union(self, node1, node2):
+        """
+        Joins the identities of the two nodes, nodes that are not yet in the graph are added
+        """
+        for node in [node1, node2]:
+            if node not in self.parent:
+                self.parent[node] = node
+        root1 = self.find(node1)
+        root2 = self.find(node2)
+        if root1 != root2:
+            self.parent[root2] = root1
+
+    def get_edges(self, node):
+        """
+        :param node: tuple, (name, 'vendor') or (pgp, 'pgp')
+        :return: dict, the edges of the identity of the node (a copy), empty if the node is not in the graph
+        """
+        if node not in self.parent:
+            return {}
+        return {key: list(value) for key, value in self.edges[self.find(node)].items()}
+
+
+def identity_edges(vendors):
+    """
+    Creates the edges of the network graph of an identity: the names are connected to their markets and the pgp's that
+    are used more than once are connected to their names
+    :param vendors: list of the (name, market, pgp) of the identity
+    :return: dict, {node : [nodes]}, a node is a tuple (value, type)
+    """
+    edges = {}
+    pgp_vendors = {}
+    for name, market, pgp in vendors:
+        # Connect vendor_name to market
+        edges.setdefault((name, 'vendor'), [])
+        if (market, 'market') not in edges[(name, 'vendor')]:
+            edges[(name, 'vendor')].append((market, 'market'))
+        if pgp is not None:
+            pgp_vendors.setdefault((pgp, 'pgp'), []).append((name, 'vendor'))
+
+    # Add pgp to edges
+    for pgp, pgp_names in pgp_vendors.items():
+        if len(pgp_names) > 1:
+            edges[pgp] = list(dict.fromkeys(pgp_names))
+    return edges
+
+
+def get_nodes_and_edges(identity_graph, df_product, name_pgp, value, products=False):
     """
-    Based on parameters and using networkx (nx) package it finds and returns the edges and nodes.
-    :param df_vendor: df, df of vendor used in app.py
+    Based on parameters it finds and returns the edges and nodes of the identity of the name or pgp.
+    :param identity_graph: IdentityGraph, the identity graph of the vendors used in app.py
     :param df_product: df, df, of product used in app.py
     :param name_pgp: str, value of ratio item choosing between 'Name' and 'PGP'
     :param value: value: str, name or pgp selected in dropdown
@@ -32,79 +135,19 @@ def get_nodes_and_edges(df_vendor, df_product, name_pgp, value, products=False):
     :return: list of edges
     """
 
-    # Find the duplicate values in the df
-    global df_product_selection
+    # The edges of the identity, all names and pgp's that are connected through shared pgp's
     if name_pgp == 'Name':
-        # Create DF based on same name
-        df_selection = df_vendor[df_vendor['name'] == value]
-        # Add vendors with same pgp
-        for pgp in df_selection.pgp.tolist():
-            if pgp is not None:
-                df_pgp = df_vendor[df_vendor['pgp'] == pgp]
-                if len(df_pgp) > 0:
-                    df_selection = df_selection.append(df_pgp).drop_duplicates(subset=['name', 'market', 'pgp'],
-                                                                               keep="first")
-
-    if name_pgp == 'PGP':
-        # Create DF based on same PGP
-        df_selection = df_vendor[df_vendor['pgp'] == value]
-        # Add vendors with same name
-        for name in df_selection.name.tolist():
-            if name is not None:
-                df_name = df_vendor[df_vendor['name'] == name]
-                if len(df_name) > 0:
-                    df_selection = df_selection.append(df_name).drop_duplicates(subset=['name', 'market', 'pgp'],
-                                                                                keep="first")
-
-    # CREATE NODES
-    # Name nodes
-    node_name = [(name, 'vendor') for name in df_selection.name.unique()]
-    # Market nodes
-    node_market = [(market, 'market') for market in df_selection.market.unique()]
-    # Pgp nodes
-    node_pgp = [(pgp, 'pgp') for pgp in df_selection.pgp.unique()]
-
-    # CREATE EDGES
-    edges = {}
-
-    tuples = list({tuple(x) for x in df_selection[['name', 'market', 'pgp']].to_numpy()})
-    tuples_new = []
-    for index, item in enumerate(tuples):
-        tuples_new.append(((item[0], 'vendor'), (item[1], 'market'), (item[2], 'pgp')))
-
-    # connect nodes
-    temporary_pgp_edges = []
-    temporary_name_edges = []
-
-    for item in tuples_new:
-        # Connect vendor_name to market
-        if item[0] not in edges:
-            edges[item[0]] = [item[1]]
-        else:
-            if edges[item[0]] != [item[1]]:
-                edges[item[0]] = edges[item[0]] + [item[1]]
-
-        # Add pgp and name nodes ot temporary lists to check whether nodes for this should be made
-        if item[2][0] is not None:
-            temporary_pgp_edges.append(item[2])
-            temporary_name_edges.append(item[0])
-
-    # Add pgp to edges
-    for index, pgp in enumerate(temporary_pgp_edges):
-        if temporary_pgp_edges.count(pgp) > 1:
-            if pgp not in edges:
-                edges[pgp] = [temporary_name_edges[index]]
-            else:
-                if edges[pgp] != [temporary_name_edges[index]]:
-                    edges[pgp] = edges[pgp] + [temporary_name_edges[index]]
+        edges = identity_graph.get_edges((value, 'vendor'))
+    else:
+        edges = identity_graph.get_edges((value, 'pgp'))
 
     # Connect market nodes to products
     if products is True:
-        for vendor_name in node_name:
-            df_product_selection = df_product[df_product['vendor'] == vendor_name[0]].drop_duplicates(
-                subset='product_id', keep="first")
+        vendor_names = [node[0] for node in edges if node[1] == 'vendor']
+        node_market = list(dict.fromkeys(market for node in edges if node[1] == 'vendor' for market in edges[node]))
+        df_product_selection = df_product[df_product['vendor'].isin(vendor_names)].drop_duplicates(
+            subset='product_id', keep="first")
 
-        product_edge = dict
         for market in node_market:
             edges[market] = [(product, 'product') for product in
                              set(df_product_selection[df_product_selection['market'] == market[0]]['name'].tolist())]
@@ -119,6 +162,38 @@ def get_nodes_and_edges(df_vendor, df_product, name_pgp, value, products=False):
     return nodes, edges
 
 
+def get_layout(network):
+    """
+    Returns the positions of the nodes in the network, a layout is computed once per set of nodes and edges.
+    When the network contains an earlier network (e.g. the same vendors with their products added), the positions of
+    the earlier network are kept and only the new nodes are placed.
+    :param network: nx.Graph(), the network
+    :return: dict, {node : position}
+    """
+    nodes = frozenset(network.nodes())
+    key = (nodes, frozenset(frozenset(edge) for edge in network.edges()))
+    with layout_cache_lock:
+        if key in layout_cache:
+            layout_cache.move_to_end(key)
+            return layout_cache[key]
+        # the largest earlier network that is part of this network
+        earlier = [cached_key for cached_key in layout_cache if cached_key[0] < nodes and cached_key[1] <= key[1]]
+        earlier_pos = layout_cache[max(earlier, key=lambda cached_key: len(cached_key[0]))] if earlier else None
+
+    if earlier_pos is not None:
+        pos_ = nx.spring_layout(network, pos=dict(earlier_pos), fixed=list(earlier_pos), seed=layout_seed)
+    elif len(nodes) > kamada_kawai_max_nodes:
+        pos_ = nx.spring_layout(network, seed=layout_seed)
+    else:
+        pos_ = nx.kamada_kawai_layout(network)
+
+    with layout_cache_lock:
+        layout_cache[key] = pos_
+        if len(layout_cache) > layout_cache_size:
+            layout_cache.popitem(last=False)
+    return pos_
+
+
 def make_edge(x, y):
     """
     # Custom function to create an edge between node x and node y, with a given text and width
@@ -171,7 +246,7 @@ def create_network_graph(nodes, edges, colordict = node_colors):
                              type=node2[1])
 
     # Get positions for the nodes in the network
-    pos_ = nx.kamada_kawai_layout(network)
+    pos_ = get_layout(network)
 
     # For each edge, make an edge_trace, append to list
     edge_trace = []
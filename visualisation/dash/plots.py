@@ -56,7 +56,8 @@ def unique_bar_plot(x_values, y_values, text_values):
 
 
 def trend_plot(df_selection, feature, name, market):
-    df_selection['extraction_date'] = pd.to_datetime(df_selection['extraction_date'], unit='s')
+    # the selection is shared with other callbacks (see datastore), thus a copy is changed
+    df_selection = df_selection.assign(extraction_date=pd.to_datetime(df_selection['extraction_date'], unit='s'))
 
     x = df_selection.sort_values('extraction_date', ascending=False)['extraction_date'].tolist()
     y = df_selection.sort_values('extraction_date', ascending=False)[feature].tolist()